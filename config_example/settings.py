@@ -4,17 +4,110 @@
 SIMULATION_MODE = False
 PORT = "COM3"
 BAUD = 115200
+# 仿真模式 (SIMULATION_MODE = True) 参数：无需真机即可在 Linux 上跑通整套搬运流程
+SIM_SERIAL_LATENCY = 0.008     # 模拟串口往返延迟 (秒)
+SIM_READ_FAIL_RATE = 0.0       # 读取失败 (返回 -1) 的概率
+SIM_SETTLE_ERROR = 1.0         # 到位后的稳态误差上限 (度)
+SIM_OVERSHOOT = 2.0            # 到位时冲过目标的最大幅度 (度)
+SIM_ANGLE_NOISE = 0.2          # 角度读数噪声标准差 (度)
+# 仿真的关节角速度系数与启动延迟，默认与下方 ARM_* 预测模型一致；改成不同值可以检验预测模型失配时的表现
+# SIM_DEG_PER_SEC_PER_SPEED = 1.6
+# SIM_MOTION_STARTUP_SEC = 0.15
+# 仿真气爪从收到指令到反馈引脚动作的延迟 (秒)，仅在配置了 GRIPPER_FEEDBACK_PIN 时生效
+SIM_GRIPPER_DELAY = 0.12
+# 仿真 GPIO 输入初始电平 (G35 / G36)
+SIM_INITIAL_INPUTS = {35: 0, 36: 0}
+# 串口仲裁：相邻两条指令之间的最小间隔 (秒)，0 表示不额外等待
+SERIAL_MIN_GAP = 0.0
+
+# --- 摄像头与主循环节拍 ---
+CAMERA_INDEX = 0
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+# 主控制循环固定周期 (秒)，G35/G36 消抖与视觉触发都按此节拍运行
+CONTROL_LOOP_PERIOD = 0.03
+# 视觉子进程数量：0 = 在主进程内处理；>=1 = 通过共享内存交给独立进程处理
+VISION_WORKERS = 0
+
+# --- 视觉触发滤波 ---
+# 最近 TRIGGER_WINDOW 帧中至少 TRIGGER_REQUIRED 帧看到物体才触发
+TRIGGER_WINDOW = 5
+TRIGGER_REQUIRED = 3
+# 已锁定颜色后，新颜色需领先的票数才会切换 (颜色迟滞)
+TRIGGER_COLOR_MARGIN = 2
+# G35 启动许可的软件消抖时间 (秒)
+G35_DEBOUNCE_SEC = 0.9
+
+# --- 机械臂运动时长预测 (用于到位检测) ---
+# 关节角速度 ≈ speed x 系数 (度/秒)；电机从收到指令到开始转动的延迟 (秒)
+ARM_DEG_PER_SEC_PER_SPEED = 1.6
+ARM_MOTION_STARTUP_SEC = 0.15
+
+# 飞越模式：mid / high 等防撞途经点进入该半径 (最大关节误差, 度) 即放行并立即下发下一个目标
+# grab / low 仍然精确闭环到位；设为 False 则所有点位都等待完全到位
+FLY_BY_ENABLED = True
+FLY_BY_RADIUS = 15.0
 
 # --- 🔥 新增：GPIO 引脚定义 (基于 M5Stack Basic) ---
 # 气爪控制 (输出): 接 G2
 GPIO_GRIPPER = 2 
 # PLC 完成信号 (输出): 接 G5
 GPIO_PLC_SIGNAL = 5
+# G5 完成脉冲宽度 (秒)，下降沿由定时器异步下发
+G5_PULSE_SEC = 0.5
 # PLC 启动信号 (输入): 接 G35
 GPIO_START_BTN = 35
 # PLC 复位信号 (输入): 接 G36
 GPIO_RESET_BTN = 36
 
+# 气爪动作时间模型 (秒)：close = 夹紧后等待，open = 松开后等待
+# "default" 为默认值，其余键为点位名 ("grab"、"slot1_low" ... "slot6_low")，只需写要覆盖的动作
+# 可用 tools/calibrate_gripper.py 实测最短可靠等待时间
+GRIPPER_TIMING = {
+    "default": {"close": 0.5, "open": 0.3},
+}
+# 气爪到位反馈输入引脚 (如气缸磁性开关)，None 表示未接线
+# 接线后以反馈信号结束等待，超过 GRIPPER_FEEDBACK_TIMEOUT 仍无反馈则按上面的固定时间兜底
+GRIPPER_FEEDBACK_PIN = None
+GRIPPER_FEEDBACK_CLOSED_LEVEL = 1
+GRIPPER_FEEDBACK_TIMEOUT = 1.0
+
+# PLC 以太网地址；离线调试时可运行 tools/plc_emulator.py 并改为 "127.0.0.1" / 1102
+PLC_IP = "192.168.0.10"
+PLC_TCP_PORT = 102
+# PLC 库存后台轮询：周期 (秒)，缓存超过 PLC_STALE_SEC 未更新即视为过期 (网页显示告警)
+PLC_POLL_PERIOD = 0.2
+PLC_STALE_SEC = 1.0
+# PLC 断线重连退避：首次等待 PLC_BACKOFF_INITIAL 秒，每次失败翻倍，最长 PLC_BACKOFF_MAX 秒，
+# 每次等待叠加 ±PLC_BACKOFF_JITTER 比例的随机抖动；连续失败 PLC_DOWN_AFTER 次后健康状态显示为 down
+PLC_BACKOFF_INITIAL = 0.5
+PLC_BACKOFF_MAX = 30.0
+PLC_BACKOFF_JITTER = 0.2
+PLC_DOWN_AFTER = 3
+# IOTstart (DB1.DBX4.4) 脉冲宽度 (秒)，下降沿由定时器异步写出，调用方不等待
+PLC_IOT_START_PULSE_SEC = 0.5
+# PLC DB1 位地址表: 名称 -> (字节, 位)，未写的名称使用 modules/plc_comm.py 中的默认值
+# 每个轮询周期用一次连续 db_read 读出覆盖全部标签的字节区间；地址必须与 PLC 程序一致！
+PLC_TAGS = {
+    "slot1": (0, 4), "slot2": (0, 5), "slot3": (0, 6), "slot4": (0, 7),
+    "slot5": (1, 0), "slot6": (1, 1),
+    "iot_start": (4, 4),        # IoT -> PLC: 推出盒子
+    "start_permit": (2, 0),     # PLC -> IoT: 启动许可 (与 G35 同义)
+    "reset_request": (2, 1),    # PLC -> IoT: 复位请求 (与 G36 同义)
+}
+# 主循环的启动许可 / 复位信号来源: "gpio" = 机械臂底座 G35 / G36 (默认)；"plc" = 上面 PLC_TAGS 中的两个标签
+# 选 "plc" 时建议把 PLC_POLL_PERIOD 调到 0.05 以下，消抖计时以 PLC 读取时间为准；
+# main.py 会自动把 G35 / G36 从 INPUT_SNAPSHOT_PINS 的采样中移除 (无需手改)，
+# 运动中的 G35 急停监控仍走硬接线，只在抓放过程中 (急停监控开启时) 采样 G35
+PLC_HANDSHAKE_SOURCE = "gpio"
+
+# 输入快照：后台按固定周期采样这些输入引脚，主循环消抖与急停监控共用同一份数据
+INPUT_SNAPSHOT_PINS = [GPIO_START_BTN, GPIO_RESET_BTN]
+INPUT_SAMPLE_PERIOD = 0.03
+# 快照采样占用串口时间的比例上限：读取耗时超出时自动拉长采样周期，队列中有其他指令时采样先让出串口
+# (预算越低，G35 急停等引脚的实际采样间隔越长；实际周期见 /api/input_stats 的 cycle_ms)
+INPUT_LINK_BUDGET = 0.5
+
 # --- 🎯 核心策略：全角度控制 (Angle Control) ---
 # 1. 抓取区配置
 PICK_POSES = {
@@ -56,4 +149,20 @@ STORAGE_RACKS = {
         "mid":   [-78.78, -1.66, -115.29, 43.7, -0.48, -85.22],
         "low":   [-76.35, -17.69, -109.46, 46.93, -1.49, -83.93]
     }
-}
\ No newline at end of file
+}
+
+# 3. 额外的安全直达边 (点对双向可走)，用于跳过观测点
+# 节点名: "observe"、"pick_mid" (PICK_POSES 的 mid)、"slot1_high" ~ "slot6_high"
+# 默认只有 observe 与其它节点相连；只有现场确认两点之间直线运动不会碰撞时才能登记！
+# 例: SAFE_DIRECT_EDGES = [("pick_mid", "slot1_high"), ("slot1_high", "slot2_high")]
+SAFE_DIRECT_EDGES = []
+
+# 4. 每段运动的速度 / 到位公差 (度) / 超时 (秒)
+# "fly" 为空中途经点默认值，"precise" 为抓取 / 放置点默认值；
+# 其余键为点位名 (与 /api/cycle_metrics 中的 move.<点位名> 一致)，只需写要覆盖的字段:
+#   "observe"、"pick_mid"、"grab"、"slot1_high"、"slot1_mid"、"slot1_low" ... "slot6_low"
+# 可用 tools/tune_motion.py 自动实测并生成本段配置
+MOTION_PROFILES = {
+    "fly":     {"speed": 80, "tolerance": 6.0, "timeout": 4.0},
+    "precise": {"speed": 50, "tolerance": 4.0, "timeout": 6.0},
+}
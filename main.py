@@ -21,10 +21,14 @@ from logging.handlers import RotatingFileHandler
 
 # --- 自定义模块导入 ---
 from modules.vision import VisionSystem
+from modules.camera import CameraCapture
+from modules.trigger_filter import TemporalTriggerFilter
+from modules.vision_worker import VisionWorkerPool
 from modules.arm_control import ArmController
 from modules.ai_decision import AIDecisionMaker
 from modules import web_server
 from modules.plc_comm import PLCClient
+from modules.plc_poller import PLCPoller
 from config import settings
 
 # ================= 配置日志系统 =================
@@ -81,6 +85,12 @@ def get_standard_success_msg(slot_id):
 # ================= 核心工作线程 =================
 def perform_pick_and_place(arm, target_slot, active_mode="SINGLE_TASK", restore_mode="IDLE"):
     """纯净版搬运流程：加入 PLC 业务握手与【动态硬件急停】机制"""
+    # 整个循环内的分段计时都记到 target_slot 名下 (/api/cycle_metrics 查看)
+    with arm.metrics.cycle(target_slot), arm.metrics.span("cycle.total"):
+        _run_pick_and_place(arm, target_slot, active_mode, restore_mode)
+
+def _run_pick_and_place(arm, target_slot, active_mode, restore_mode):
+    span = arm.metrics.span
     emergency_stopped = False
     try:
         state.is_at_observe = False
@@ -90,24 +100,26 @@ def perform_pick_and_place(arm, target_slot, active_mode="SINGLE_TASK", restore_
         arm.monitor_g35_estop = True
         
         # --- 2. 抓取 ---
-        arm.pick()
+        with span("cycle.pick"):
+            arm.pick(next_slot=target_slot)
         
         if state.mode == "IDLE" and restore_mode != "IDLE":
             print(log_msg("WARN", "System", "Interrupt detected."))
             restore_mode = "IDLE"
 
         # --- 3. 放置 ---
-        arm.place(target_slot)
+        with span("cycle.place"):
+            arm.place(target_slot)
         
         # 🔥 4. 东西已经稳稳放下！任务完成！
         # 此时必须立刻关闭监控，因为一旦发送 G5，PLC 马上就会合法地撤销 G35！
         arm.monitor_g35_estop = False
         
         # --- 5. 向 PLC 发送 G5 完成信号 ---
+        # 异步脉冲：拉高后立即返回，0.5 秒后由定时器拉低，回程运动与脉冲并行
         print(log_msg("INFO", "System", "Sending Task Complete Signal (G5) to PLC..."))
-        arm.set_plc_signal(True)
-        time.sleep(0.5)
-        arm.set_plc_signal(False)
+        with span("cycle.g5"):
+            arm.pulse_plc_signal(getattr(settings, 'G5_PULSE_SEC', 0.5))
         
         # --- 6. 更新系统状态 ---
         state.inventory[target_slot] = 1
@@ -131,8 +143,9 @@ def perform_pick_and_place(arm, target_slot, active_mode="SINGLE_TASK", restore_
         
         if not emergency_stopped:
             print(log_msg("INFO", "System", "Returning to Observe Point..."))
-            try: arm.go_observe() 
-            except: pass
+            with span("cycle.return"):
+                try: arm.go_observe() 
+                except: pass
             state.is_at_observe = True
         else:
             print(log_msg("WARN", "System", "⚠️ 机台处于急停状态，已放弃归位，等待人工介入处理。"))
@@ -161,12 +174,69 @@ def main():
     ai = AIDecisionMaker()
     
     print(log_msg("INFO", "System", "Connecting to PLC (Ethernet) for Inventory Only..."))
-    plc = PLCClient(ip='192.168.0.10')
+    plc = PLCClient(
+        ip=getattr(settings, 'PLC_IP', '192.168.0.10'),
+        tcp_port=getattr(settings, 'PLC_TCP_PORT', 102),
+        backoff_initial=getattr(settings, 'PLC_BACKOFF_INITIAL', 0.5),
+        backoff_max=getattr(settings, 'PLC_BACKOFF_MAX', 30.0),
+        backoff_jitter=getattr(settings, 'PLC_BACKOFF_JITTER', 0.2),
+        down_after=getattr(settings, 'PLC_DOWN_AFTER', 3),
+        iot_start_pulse=getattr(settings, 'PLC_IOT_START_PULSE_SEC', 0.5),
+        tags=getattr(settings, 'PLC_TAGS', None)
+    )
+    # 库存由后台线程定频读取，主循环只读缓存，PLC 网络抖动不再卡住控制线程
+    plc_poller = PLCPoller(
+        plc,
+        period=getattr(settings, 'PLC_POLL_PERIOD', 0.2),
+        stale_after=getattr(settings, 'PLC_STALE_SEC', 1.0)
+    )
+    plc_poller.on_change(lambda slot_id, old, new, ts: print(log_msg("INFO", "PLC", f"槽位 {slot_id} 状态变化: {old} -> {new}")))
+    plc_poller.start()
+    last_inventory_seq = 0
+
+    # 启动许可 / 复位信号来源：机械臂 GPIO (G35 / G36) 或 PLC 以太网过程映像
+    handshake_source = getattr(settings, 'PLC_HANDSHAKE_SOURCE', 'gpio')
+    if handshake_source == "plc" and not {"start_permit", "reset_request"} <= set(plc.tags):
+        print(log_msg("WARN", "PLC", "PLC_TAGS 缺少 start_permit / reset_request，握手信号退回 GPIO"))
+        handshake_source = "gpio"
+    print(log_msg("INFO", "System", f"Handshake source: {handshake_source}"))
+    if handshake_source == "plc":
+        # 握手不再读 G35 / G36：从输入快照中移除，避免空闲时仍按周期占用串口
+        arm.drop_handshake_inputs()
+
+    def read_handshake(tag, pin):
+        """返回 (电平, 采样时间)；PLC 缓存过期时电平为 None，按低电平处理"""
+        if handshake_source == "plc":
+            return plc_poller.get_tag(tag)
+        return arm.get_input_sample(pin)
     
     # 🔥 彻底移除 MockCamera，强制使用真实的物理摄像头
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # 摄像头由独立采集线程持有，主循环只取最新帧，不再被 cap.read() 阻塞
+    camera = CameraCapture(
+        index=getattr(settings, 'CAMERA_INDEX', 0),
+        width=getattr(settings, 'CAMERA_WIDTH', 640),
+        height=getattr(settings, 'CAMERA_HEIGHT', 480)
+    ).start()
+    last_frame_seq = 0
+    vision_data = None
+
+    # 可选：视觉放到独立子进程 (共享内存传图)，0 表示在主进程内处理
+    vision_pool = None
+    if getattr(settings, 'VISION_WORKERS', 0) > 0:
+        vision_pool = VisionWorkerPool(workers=settings.VISION_WORKERS)
+
+    # 视觉时间投票：N-of-M 帧稳定后才允许触发，颜色带迟滞
+    trigger_filter = TemporalTriggerFilter(
+        window=getattr(settings, 'TRIGGER_WINDOW', 5),
+        required=getattr(settings, 'TRIGGER_REQUIRED', 3),
+        color_margin=getattr(settings, 'TRIGGER_COLOR_MARGIN', 2)
+    )
+    stable_vision = None
+    # G35 启动许可的消抖时间 (秒)
+    g35_debounce = getattr(settings, 'G35_DEBOUNCE_SEC', 0.9)
+
+    # 主控制循环固定节拍 (秒)，与摄像头帧率解耦
+    loop_period = getattr(settings, 'CONTROL_LOOP_PERIOD', 0.03)
 
     # 纯净启动逻辑: 直接让机械臂归位并就绪
     if arm.mc:
@@ -174,7 +244,7 @@ def main():
         arm.go_observe()
         state.is_at_observe = True
 
-    web_thread = threading.Thread(target=web_server.start_flask, args=(state, ai), daemon=True)
+    web_thread = threading.Thread(target=web_server.start_flask, args=(state, ai, arm, plc_poller), daemon=True)
     web_thread.start()
     
     print(log_msg("INFO", "Web", "Console at http://127.0.0.1:5000"))
@@ -183,16 +253,20 @@ def main():
 
     try:
         while True:
+            tick_start = time.time()
+
             # --- 硬件物理复位逻辑 (G36) ---
             # ==========================================
-            raw_g36 = arm.is_reset_signal_active()
+            # 读输入快照 (后台定频采样)，计时以采样时间为准，不受主循环节拍抖动影响
+            g36_val, g36_ts = read_handshake("reset_request", settings.GPIO_RESET_BTN)
+            raw_g36 = g36_val == 1
             
             # 1. 对 G36 进行连续高电平计时
             if raw_g36:
                 if state.g36_high_start_time == 0.0:
-                    state.g36_high_start_time = time.time()
+                    state.g36_high_start_time = g36_ts
                 # 只要连续高电平超过 0.9 秒 (PLC给的是1秒脉冲)，就确认为真实触发！
-                elif time.time() - state.g36_high_start_time >= 0.9:
+                elif g36_ts - state.g36_high_start_time >= 0.9:
                     state.g36_valid = True
             else:
                 # 只要断开一瞬间，立刻清零计时器，无情过滤静电毛刺
@@ -233,11 +307,12 @@ def main():
                     time.sleep(1.2)
         
 
-            # 保留的 PLC 交互：单纯读取物理库存
+            # 保留的 PLC 交互：单纯读取物理库存 (读后台轮询的缓存，只在有新读数时更新)
             # ==========================================
-            real_inventory = plc.get_slots_status()
-            if real_inventory: 
+            real_inventory, _, inventory_seq = plc_poller.get()
+            if real_inventory and inventory_seq != last_inventory_seq:
                 state.inventory = real_inventory
+                last_inventory_seq = inventory_seq
 
             # --- 心跳检测 ---
             if state.mode != "IDLE" and (time.time() - state.last_heartbeat > 5.0):
@@ -264,10 +339,37 @@ def main():
                     state.mode = "IDLE"; state.system_msg = "Warehouse Full"
 
             # --- 视觉处理 ---
-            ret, frame = cap.read()
-            if not ret: time.sleep(0.1); continue
-            processed_frame, vision_data = vision.process_frame(frame)
-            web_server.update_frame(processed_frame)
+            # 只处理采集线程送来的新帧；摄像头慢时沿用上一帧的结果，控制循环照常运转
+            new_results = []
+            frame_seq, frame_ts, frame = camera.latest()
+            if frame is not None and frame_seq != last_frame_seq:
+                last_frame_seq = frame_seq
+                if vision_pool and not vision_pool.failed:
+                    # 子进程模式：投递到共享内存后立即返回
+                    vision_pool.submit(frame, frame_seq, frame_ts)
+                else:
+                    # 纯检测：只在 ROI 视图上计算，不复制整帧、不绘图 (子进程池失效时也走这里)
+                    vision_data = vision.detect(frame)
+                    new_results.append((frame_ts, vision_data))
+
+                # 标注画面只在有人打开 /video_feed 时才生成 (在副本上绘制，原始帧保持干净)
+                if web_server.has_viewers():
+                    web_server.update_frame(vision.draw_overlay(frame.copy(), vision_data), frame_seq)
+
+            if vision_pool:
+                for _, result_ts, result in vision_pool.poll():
+                    vision_data = result
+                    new_results.append((result_ts, result))
+
+            # 只有停在观测点时的画面才参与投票，离开观测点即清空窗口
+            for result_ts, result in new_results:
+                if state.is_at_observe:
+                    stable_vision = trigger_filter.update(result, result_ts)
+                    if stable_vision["latency"] is not None:
+                        print(log_msg("INFO", "Vision", f"稳定判定: {stable_vision['color']} (入区到判定耗时 {stable_vision['latency']*1000:.0f} ms)"))
+                else:
+                    trigger_filter.reset()
+                    stable_vision = None
 
             # --- AI 指令 ---
             if state.pending_ai_cmd:
@@ -323,20 +425,21 @@ def main():
             trigger_detected = False
             detected_color = "unknown"
 
-            # 1. 视觉条件：在观测点 且 看到物品
-            if state.is_at_observe and vision_data and vision_data.get("detected"):
+            # 1. 视觉条件：在观测点 且 多帧投票稳定地看到物品
+            if state.is_at_observe and stable_vision and stable_vision.get("detected"):
                 trigger_detected = True
-                detected_color = vision_data.get("color", "unknown").lower()
+                detected_color = stable_vision.get("color", "unknown")
             
-            # 2. 硬件条件：实时读取底座 G35 引脚并进行【软件消抖】
-            raw_g35 = arm.is_start_signal_active()
+            # 2. 硬件条件：读取底座 G35 引脚快照并进行【软件消抖】
+            g35_val, g35_ts = read_handshake("start_permit", settings.GPIO_START_BTN)
+            raw_g35 = g35_val == 1
             
             if raw_g35:
-                # 如果是第一次检测到高电平，记录当前时间
+                # 如果是第一次检测到高电平，记录采样时间
                 if state.g35_high_start_time == 0.0:
-                    state.g35_high_start_time = time.time()
-                # 如果持续高电平超过了 0.5 秒（500毫秒），则认定信号有效
-                elif time.time() - state.g35_high_start_time >= 0.9:
+                    state.g35_high_start_time = g35_ts
+                # 如果持续高电平超过了消抖时间 (默认 0.9 秒)，则认定信号有效
+                elif g35_ts - state.g35_high_start_time >= g35_debounce:
                     state.g35_valid = True
             else:
                 # 只要一断开（哪怕是 1 毫秒的低电平毛刺），立刻清零，绝不误触发！
@@ -392,13 +495,16 @@ def main():
                         state.mode = "IDLE"; state.system_msg = "Buffer Full"
                 time.sleep(0.5)
 
-            time.sleep(0.03)
+            # 固定节拍：扣除本轮耗时后再休眠
+            time.sleep(max(0.0, loop_period - (time.time() - tick_start)))
 
     except KeyboardInterrupt:
         print(log_msg("INFO", "System", "User Exit."))
     finally:
+        if 'plc_poller' in locals(): plc_poller.stop()
         if 'plc' in locals(): plc.close()
-        cap.release()
+        camera.release()
+        if vision_pool: vision_pool.close()
         cv2.destroyAllWindows()
         sys.exit(0)
 
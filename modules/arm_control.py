@@ -9,33 +9,121 @@
 # modules/arm_control.py
 
 import time
-import math
+import logging
+import threading
 from config import settings
+from modules.serial_arbiter import SerialArbiter, ArbitratedRobot
+from modules.input_snapshot import InputSnapshot
+from modules.motion_planner import MotionPlanner, OBSERVE, PICK_MID, slot_node
+from modules.cycle_metrics import CycleMetrics
 
 try:
     from pymycobot import MyCobot280
 except ImportError:
-    from pymycobot import MyCobot as MyCobot280
+    try:
+        from pymycobot import MyCobot as MyCobot280
+    except ImportError:
+        MyCobot280 = None  # 仿真模式下不需要 pymycobot
 
 class ArmController:
     def __init__(self):
         self.mc = None
+        self.arbiter = None
         self.is_connected = False
         
+        # 运动参数：fly (空中飞越) / precise (精准下探) 两类默认值，
+        # settings.MOTION_PROFILES 可以按点位 (段) 覆盖 speed / tolerance / timeout
+        self.motion_profiles = {
+            "fly":     {"speed": 80, "tolerance": 6.0, "timeout": 4.0},
+            "precise": {"speed": 50, "tolerance": 4.0, "timeout": 6.0},
+        }
+        for name, profile in getattr(settings, 'MOTION_PROFILES', {}).items():
+            self.motion_profiles[name] = dict(self.motion_profiles.get(name, {}), **profile)
+
         # 速度设置
-        self.speed = 50         # 精准下探速度
-        self.fly_speed = 80     # 空中飞越速度
+        self.speed = self.motion_profiles["precise"]["speed"]       # 精准下探速度
+        self.fly_speed = self.motion_profiles["fly"]["speed"]       # 空中飞越速度
         
-        self.fly_timeout = 4.0     
-        self.arrival_timeout = 6.0 
+        self.fly_timeout = self.motion_profiles["fly"]["timeout"]
+        self.arrival_timeout = self.motion_profiles["precise"]["timeout"]
+
+        # 握手信号改由 PLC 提供时，G35 只在急停监控开启期间进入输入快照 (见 drop_handshake_inputs)
+        self._g35_on_demand = False
+        self._monitor_g35_estop = False
+
+        # 运动时长预测模型：关节角速度 ≈ speed x 系数 (度/秒)，外加电机启动延迟
+        self.deg_per_sec_per_speed = getattr(settings, 'ARM_DEG_PER_SEC_PER_SPEED', 1.6)
+        self.motion_startup = getattr(settings, 'ARM_MOTION_STARTUP_SEC', 0.15)
+        self.poll_lead = 0.25       # 提前多少秒开始密集轮询
+        self.poll_interval = 0.04   # 密集轮询间隔
+
+        # 飞越模式：防撞途经点 (mid / high / 过渡 observe) 进入粗略半径即放行，立即下发下一个目标
+        self.fly_by_enabled = getattr(settings, 'FLY_BY_ENABLED', True)
+        self.fly_by_radius = getattr(settings, 'FLY_BY_RADIUS', 15.0)
+
+        # 上一次下发的目标角度 (用来估算下一段位移)；未知时退回固定等待
+        self._last_target = None
+        self.last_move_stats = None
+        self.logger = logging.getLogger("CoffeeSystem.Arm")
 
-        self.monitor_g35_estop = False
+        # 点位索引与安全路网：启动时一次性算好所有点对的最短时间路线
+        self.planner = MotionPlanner(settings.PICK_POSES, settings.STORAGE_RACKS, self.fly_speed,
+                                     self.deg_per_sec_per_speed, self.motion_startup,
+                                     getattr(settings, 'SAFE_DIRECT_EDGES', []))
+        self._at_node = None    # 当前所在的路网节点 (None 表示不在路网上 / 未知)
+
+        # 输入引脚快照：后台定频采样，主循环消抖和急停监控共用
+        self.inputs = None
+
+        # 节拍分段计时 (按槽位 / 阶段的直方图)，main 的搬运线程与本类共用
+        self.metrics = CycleMetrics()
+
+        # 气爪动作时间模型：default 为默认等待时间，其余键为点位名，可单独覆盖 close / open
+        self.gripper_timing = {"default": {"close": 0.5, "open": 0.3}}
+        for name, timing in getattr(settings, 'GRIPPER_TIMING', {}).items():
+            self.gripper_timing[name] = dict(self.gripper_timing.get(name, {}), **timing)
+        # 气爪到位反馈引脚 (未接线为 None)：接线后以反馈信号结束等待，固定时间只作为兜底
+        self.gripper_feedback_pin = getattr(settings, 'GRIPPER_FEEDBACK_PIN', None)
+        self.gripper_closed_level = getattr(settings, 'GRIPPER_FEEDBACK_CLOSED_LEVEL', 1)
+        self.gripper_feedback_timeout = getattr(settings, 'GRIPPER_FEEDBACK_TIMEOUT', 1.0)
+
+        # G5 异步脉冲：下降沿由定时器经串口仲裁下发
+        self._pulse_lock = threading.Lock()
+        self._pulse_timer = None
         
         self._init_robot()
 
+    def _create_robot(self):
+        """SIMULATION_MODE 下使用运动学仿真后端，其余情况连接真实机械臂"""
+        if getattr(settings, 'SIMULATION_MODE', False):
+            from modules.sim_robot import SimulatedMyCobot280
+            robot = SimulatedMyCobot280(
+                initial_angles=settings.PICK_POSES.get("sleep") or settings.PICK_POSES["observe"],
+                deg_per_sec_per_speed=getattr(settings, 'SIM_DEG_PER_SEC_PER_SPEED', self.deg_per_sec_per_speed),
+                motion_startup=getattr(settings, 'SIM_MOTION_STARTUP_SEC', self.motion_startup),
+                latency=getattr(settings, 'SIM_SERIAL_LATENCY', 0.008),
+                read_fail_rate=getattr(settings, 'SIM_READ_FAIL_RATE', 0.0),
+                settle_error=getattr(settings, 'SIM_SETTLE_ERROR', 1.0),
+                overshoot=getattr(settings, 'SIM_OVERSHOOT', 2.0),
+                noise=getattr(settings, 'SIM_ANGLE_NOISE', 0.2),
+                inputs=getattr(settings, 'SIM_INITIAL_INPUTS', {settings.GPIO_START_BTN: 0, settings.GPIO_RESET_BTN: 0})
+            )
+            if self.gripper_feedback_pin is not None:
+                # 气爪反馈：夹紧 / 松开指令经过气路延迟后反馈引脚跟随变化
+                robot.link_output(settings.GPIO_GRIPPER, self.gripper_feedback_pin,
+                                  getattr(settings, 'SIM_GRIPPER_DELAY', 0.12),
+                                  invert=self.gripper_closed_level == 0)
+            return robot
+        if MyCobot280 is None:
+            raise ImportError("未安装 pymycobot，只能在 SIMULATION_MODE 下运行")
+        return MyCobot280(settings.PORT, settings.BAUD)
+
     def _init_robot(self):
         try:
-            self.mc = MyCobot280(settings.PORT, settings.BAUD)
+            robot = self._create_robot()
+            # 串口由仲裁线程独占，所有线程的指令按优先级排队 (急停永远最先)
+            self.arbiter = SerialArbiter(robot, min_gap=getattr(settings, 'SERIAL_MIN_GAP', 0.0))
+            self.mc = ArbitratedRobot(self.arbiter)
             time.sleep(0.5)
             if not self.mc.is_power_on(): self.mc.power_on()
             
@@ -44,7 +132,18 @@ class ArmController:
             
             self.gripper_open()
             self.set_plc_signal(False) # 现在这句终于能生效了，开机强制拉低 G5
-            print(f"✅ [Arm] 已成功连接真实机械臂于 {settings.PORT}")
+
+            pins = list(getattr(settings, 'INPUT_SNAPSHOT_PINS', [settings.GPIO_START_BTN, settings.GPIO_RESET_BTN]))
+            if self.gripper_feedback_pin is not None and self.gripper_feedback_pin not in pins:
+                pins.append(self.gripper_feedback_pin)
+            self.inputs = InputSnapshot(self._read_input_direct, pins,
+                                        period=getattr(settings, 'INPUT_SAMPLE_PERIOD', 0.03),
+                                        budget=getattr(settings, 'INPUT_LINK_BUDGET', 0.5),
+                                        pending_fn=self.arbiter.pending).start()
+            if getattr(settings, 'SIMULATION_MODE', False):
+                print("✅ [Arm] 仿真模式：已连接运动学仿真机械臂 (不会驱动真实硬件)")
+            else:
+                print(f"✅ [Arm] 已成功连接真实机械臂于 {settings.PORT}")
         except Exception as e:
             print(f"❌ [Arm] 连接真实机械臂失败: {e}")
 
@@ -54,11 +153,109 @@ class ArmController:
     def gripper_close(self):
         if self.is_connected: self.mc.set_basic_output(settings.GPIO_GRIPPER, 1)
 
+    def get_gripper_dwell(self, action, pose=None):
+        """点位 pose 上 close / open 动作后的等待时间 (秒)"""
+        timing = self.gripper_timing.get(pose, {}) if pose else {}
+        return timing.get(action, self.gripper_timing["default"][action])
+
+    def gripper_close_and_wait(self, pose=None):
+        """夹紧并等待气爪到位 (有反馈引脚时以反馈为准)"""
+        self.gripper_close()
+        self._wait_gripper("close", pose, self.gripper_closed_level)
+
+    def gripper_open_and_wait(self, pose=None):
+        """松开并等待气爪到位 (有反馈引脚时以反馈为准)"""
+        self.gripper_open()
+        self._wait_gripper("open", pose, 1 - self.gripper_closed_level)
+
+    def _wait_gripper(self, action, pose, expected_level):
+        dwell = self.get_gripper_dwell(action, pose)
+        pin = self.gripper_feedback_pin
+        if pin is None or not self.is_connected:
+            self.safe_sleep(dwell)
+            return
+
+        # 反馈模式：读到期望电平即结束；超时说明传感器或气路异常，退回固定等待兜底
+        start = time.time()
+        poll = self.inputs.period if self.inputs else 0.02
+        while time.time() - start < self.gripper_feedback_timeout:
+            if not self.check_g35_safe():
+                self.emergency_stop()
+                raise RuntimeError("EMERGENCY_STOP")
+            if self.get_input(pin) == expected_level:
+                self.logger.info(f"[Arm] 气爪 {action} 反馈到位: {time.time() - start:.3f}s")
+                return
+            time.sleep(poll)
+
+        print(f"⚠️ [Arm] 气爪 {action} 在 {self.gripper_feedback_timeout}s 内未收到反馈 (G{pin})，按固定时间兜底等待")
+        self.safe_sleep(max(0.0, dwell - (time.time() - start)))
+
     def set_plc_signal(self, active: bool):
+        # 手动置位/复位会取代尚未结束的异步脉冲
+        self.cancel_plc_pulse()
+        self._write_plc_signal(active)
+
+    def _write_plc_signal(self, active):
         if self.is_connected:
             self.mc.set_basic_output(settings.GPIO_PLC_SIGNAL, 1 if active else 0)
 
+    def pulse_plc_signal(self, duration=0.5):
+        """
+        非阻塞 G5 脉冲：同步拉高 (确认上升沿已下发)，再由定时器在 duration 秒后拉低
+        调用方无需等待，可以立即开始回程运动；两次写 IO 都经过串口仲裁，不会与运动指令冲突
+        """
+        with self._pulse_lock:
+            if self._pulse_timer is not None:
+                self._pulse_timer.cancel()
+            self._write_plc_signal(True)
+            timer = threading.Timer(duration, self._end_plc_pulse)
+            timer.daemon = True
+            self._pulse_timer = timer
+            timer.start()
+
+    def _end_plc_pulse(self):
+        with self._pulse_lock:
+            if self._pulse_timer is not threading.current_thread():
+                return  # 已被新的脉冲或手动置位取代
+            self._pulse_timer = None
+            self._write_plc_signal(False)
+
+    def cancel_plc_pulse(self):
+        """取消尚未结束的脉冲 (不改变 G5 当前电平)；返回是否确实取消了一个脉冲"""
+        with self._pulse_lock:
+            timer, self._pulse_timer = self._pulse_timer, None
+        if timer is not None:
+            timer.cancel()
+            return True
+        return False
+
     # ================= 🌟 急停与监控逻辑 =================
+    @property
+    def monitor_g35_estop(self):
+        return self._monitor_g35_estop
+
+    @monitor_g35_estop.setter
+    def monitor_g35_estop(self, value):
+        self._monitor_g35_estop = bool(value)
+        if self._g35_on_demand and self.inputs:
+            self.inputs.set_pins(self._snapshot_pins())
+
+    def _snapshot_pins(self):
+        pins = [p for p in self.inputs.pins if p not in (settings.GPIO_START_BTN, settings.GPIO_RESET_BTN)]
+        if self._monitor_g35_estop:
+            pins.append(settings.GPIO_START_BTN)
+        return pins
+
+    def drop_handshake_inputs(self):
+        """
+        启动许可 / 复位改由 PLC 标签提供时调用：输入快照不再常驻采样 G35 / G36，
+        G35 只在急停监控开启 (抓放过程中) 时采样，空闲时串口上不再有握手引脚的读取
+        """
+        self._g35_on_demand = True
+        if self.inputs:
+            self.inputs.set_pins(self._snapshot_pins())
+            print(f"[Arm] 握手信号走 PLC，输入快照采样引脚: {self.inputs.pins} (G35 仅在急停监控期间采样)")
+
     def check_g35_safe(self):
         """
         实时监控 G35 (启动许可信号)：只有明确读到 0（断开）才触发急停。
@@ -70,12 +267,27 @@ class ArmController:
             return True
             
         # 🔥 修改这里：现在 G35 对应的是 START_BTN！
-        val = self.get_input(settings.GPIO_START_BTN)
+        pin = settings.GPIO_START_BTN
+
+        if self.inputs and self.inputs.is_fresh(pin):
+            # 快照模式：必须连续两个不同的新鲜采样都为 0 才判定断开 (替代原先的 20ms 二次读取)
+            val, _, seq = self.inputs.get(pin)
+            if val == 0:
+                sample = self.inputs.wait_newer(pin, seq, timeout=self.inputs.interval * 3)
+                if sample is None:
+                    # 采样线程被串口争用拖慢，没等到新采样不算第二次读到 0：直接读一次确认
+                    return self._read_input_direct(pin) != 0
+                if sample[0] == 0:
+                    return False
+            return True
+
+        # 快照过期 (采样线程卡住或未启动)：退回直接读串口
+        val = self._read_input_direct(pin)
         
         if val == 0:
             time.sleep(0.02)
             # 🔥 这里也要同步修改
-            val2 = self.get_input(settings.GPIO_START_BTN)
+            val2 = self._read_input_direct(pin)
             if val2 == 0:    
                 return False
         return True
@@ -87,21 +299,51 @@ class ArmController:
             if not self.check_g35_safe():
                 self.emergency_stop() # 立即下发硬件急停指令！
                 raise RuntimeError("EMERGENCY_STOP") # 抛出异常，切断后续所有代码
-            time.sleep(0.05) # 每次只睡 0.05 秒，然后起来检查
+            # 每次最多睡 0.05 秒，然后起来检查 (最后一段只睡剩余时间，避免多等)
+            time.sleep(min(0.05, max(0.0, duration - (time.time() - start_time))))
 
     # ================= 🌟 工业级闭环控制核心 =================
-    def wait_for_arrival(self, target_angles, tolerance=4.5, timeout=5.0):
+    def predict_move_duration(self, start_angles, target_angles, speed, radius=0.0):
+        """根据最大关节位移和指令速度估算运动时长 (秒)，radius > 0 时估算进入该半径的时刻；起点未知时返回 None"""
+        if not start_angles or speed <= 0:
+            return None
+        distance = max(abs(t - s) for s, t in zip(start_angles, target_angles))
+        return self.motion_startup + max(0.0, distance - radius) / (speed * self.deg_per_sec_per_speed)
+
+    def wait_for_arrival(self, target_angles, tolerance=4.5, timeout=5.0,
+                         predicted=None, start_angles=None, sent_at=None, precise=False):
+        """
+        闭环到位检测
+        - predicted 已知时：先安全休眠到预测结束前 poll_lead 秒，再密集轮询；否则沿用固定 0.5 秒启动等待
+        - 用相邻两次采样估算关节角速度，外推下一刻位置已进入公差即提前放行
+          (仅限飞越 / 非精准点位；precise=True 的抓放点位必须实测进入公差或停稳后才放行，之后气爪才会动作)
+        - 记录每段运动的超调量和实际到位时间
+        """
         if not self.is_connected: return False
 
-        # 发指令后等待电机启动
-        self.safe_sleep(0.5)
+        sent_at = sent_at or time.time()
+
+        # 发指令后等待电机启动 / 运动接近尾声
+        if predicted is None:
+            self.safe_sleep(0.5)
+        else:
+            self.safe_sleep(max(0.0, predicted - self.poll_lead - (time.time() - sent_at)))
 
         start_time = time.time()
         last_valid_angles = None
         
         # 🔥 新增：用于记录上一帧角度，判断机械臂是否已经“物理静止”
         prev_angles = None
-        stable_count = 0
+        prev_time = None
+        still_since = None
+        max_overshoot = 0.0
+        arrived = False
+        reason = "timeout"
+
+        # 各关节的运动方向，用来计算冲过目标的超调量
+        directions = None
+        if start_angles:
+            directions = [1 if t >= s else -1 for s, t in zip(start_angles, target_angles)]
 
         while time.time() - start_time < timeout:
             if not self.check_g35_safe():
@@ -109,34 +351,65 @@ class ArmController:
                 raise RuntimeError("EMERGENCY_STOP")
 
             current_angles = self.mc.get_angles()
+            now = time.time()
             
             if isinstance(current_angles, list) and len(current_angles) == 6:
                 last_valid_angles = current_angles
                 diffs = [abs(c - t) for c, t in zip(current_angles, target_angles)]
                 max_error = max(diffs)
+
+                if directions:
+                    overshoot = max((c - t) * d for c, t, d in zip(current_angles, target_angles, directions))
+                    max_overshoot = max(max_overshoot, overshoot)
                 
                 # 方案 A：理论精度达标，完美到达
                 if max_error <= tolerance:
-                    return True
+                    arrived, reason = True, "tolerance"
+                    break
                 
-                # 方案 B：物理静止判定（防止受重力/负载影响永远达不到理论值而死等）
-                if prev_angles:
-                    # 计算最近 0.1 秒内，6个关节最大移动了多少度
-                    move_diff = max([abs(c - p) for c, p in zip(current_angles, prev_angles)])
-                    
-                    if move_diff < 0.5:  # 0.1秒内动了不到0.5度，说明基本停住了
-                        stable_count += 1
+                if prev_angles and now > prev_time:
+                    dt = now - prev_time
+                    velocities = [(c - p) / dt for c, p in zip(current_angles, prev_angles)]
+                    max_speed = max(abs(v) for v in velocities)
+
+                    # 方案 B：速度外推，下一个轮询周期内就会进入公差，提前放行 (精准点位不适用)
+                    if not precise:
+                        horizon = self.poll_interval * 2
+                        projected = max(abs(c + v * horizon - t) for c, v, t in zip(current_angles, velocities, target_angles))
+                        if projected <= tolerance and max_error <= tolerance * 1.5:
+                            arrived, reason = True, "extrapolated"
+                            break
+
+                    # 方案 C：物理静止判定（防止受重力/负载影响永远达不到理论值而死等）
+                    # 角速度低于 5 度/秒 (等价于原先 0.1 秒内动了不到 0.5 度)
+                    if max_speed < 5.0:
+                        still_since = still_since or prev_time
                     else:
-                        stable_count = 0  # 如果还在动，清零重新计
+                        still_since = None  # 如果还在动，清零重新计
                     
-                    # 🔥 核心：如果连续3次(约0.3秒)几乎不动，且误差不是特别离谱(比如放宽到 8.5度内)，果断放行！
-                    if stable_count >= 3 and max_error <= 8.5:
+                    # 🔥 核心：如果持续约 0.3 秒几乎不动，且误差不是特别离谱(比如放宽到 8.5度内)，果断放行！
+                    if still_since and now - still_since >= 0.3 and max_error <= 8.5:
                         # print(f"💡 [Arm] 智能放行：虽有 {round(max_error, 1)}° 稳态误差，但已物理停稳，提前结束死等。")
-                        return True
+                        arrived, reason = True, "settled"
+                        break
 
                 prev_angles = current_angles
+                prev_time = now
             
-            time.sleep(0.1)
+            time.sleep(self.poll_interval if predicted is not None else 0.1)
+
+        settle_time = time.time() - sent_at
+        self.last_move_stats = {
+            "predicted": round(predicted, 3) if predicted is not None else None,
+            "settle_time": round(settle_time, 3),
+            "overshoot": round(max_overshoot, 2),
+            "reason": reason
+        }
+        pred_text = f"{predicted:.2f}s" if predicted is not None else "-"
+        self.logger.info(f"[Arm] 运动完成({reason}): 预测 {pred_text} / 实际 {settle_time:.2f}s, 超调 {max_overshoot:.1f}°")
+
+        if arrived:
+            return True
             
         if last_valid_angles:
             diffs = [round(abs(c - t), 1) for c, t in zip(last_valid_angles, target_angles)]
@@ -163,29 +436,81 @@ class ArmController:
             
         print("[Arm] 正在缓慢降落至安全休眠点...")
         # 3. 缓慢、安全地向下折叠到休眠点 (把速度降到 30，追求极致平稳)
-        self.move_to_angles_smart(safe_angles, 30, timeout=10.0)
+        self.move_to_angles_smart(safe_angles, 30, timeout=10.0, label="sleep", precise=True)
         
         # 4. 停稳后，彻底切断主板对电机的供电
         print("[Arm] 已安全趴下，正在切断电机电源...")
         time.sleep(1.0) # 缓冲1秒，确保动能完全释放
+        # 断电后不再下发任何 IO，尚未结束的 G5 脉冲必须在此之前拉低
+        if self.cancel_plc_pulse():
+            self._write_plc_signal(False)
         self.mc.power_off()
         
         # 5. 标记为未连接，防止后续错误发指令
         self.is_connected = False 
         print("[Arm] 💤 晚安！电机已释放，您可以安全关闭总电源了。")
 
-    def move_to_angles_smart(self, angles, speed, timeout):
-        """发送角度并智能等待到达 (带有动态公差)"""
+    def get_profile(self, label=None, precise=False):
+        """点位 label 的运动参数 {speed, tolerance, timeout}：类别默认值 + MOTION_PROFILES 中该点位的覆盖"""
+        profile = dict(self.motion_profiles["precise" if precise else "fly"])
+        if label:
+            profile.update(self.motion_profiles.get(label, {}))
+        return profile
+
+    def move_to_angles_smart(self, angles, speed=None, timeout=None, fly_by=False, label=None, precise=None):
+        """
+        发送角度并智能等待到达 (带有动态公差与运动时长预测)，返回是否到位
+        - speed / timeout 不传时按 label 查 MOTION_PROFILES；precise=True 表示抓放类精准点位
+          (不传时沿用旧规则：速度不等于飞越速度即视为精准点位)
+        - fly_by=True 表示这是防撞途经点：进入 fly_by_radius 即返回，不等停稳，由下一条指令接力
+        - label 为点位名，耗时记入节拍统计的 "move.<label>" 阶段
+        """
+        if precise is None:
+            precise = speed is not None and speed != self.fly_speed
+        profile = self.get_profile(label, precise)
+        speed = speed or profile["speed"]
+        timeout = timeout or profile["timeout"]
+
+        with self.metrics.span(f"move.{label or 'other'}"):
+            return self._move_to_angles(angles, speed, timeout, fly_by, profile["tolerance"], precise)
+
+    def _move_to_angles(self, angles, speed, timeout, fly_by, tol, precise=False):
         if self.is_connected:
+            start_angles = self._last_target
             self.mc.send_angles(angles, speed)
+            sent_at = time.time()
+            self._last_target = list(angles)
+            self._at_node = None
             
-            # 🔥 动态公差：飞越途经点(速度快)要求低，抓取放置点(速度慢)要求高
-            tol = 6.0 if speed == self.fly_speed else 4.0
-            
-            self.wait_for_arrival(angles, tolerance=tol, timeout=timeout)
+            # 🔥 动态公差：飞越途经点要求低，抓取放置点要求高 (由运动参数给出)
+            radius = 0.0
+            if fly_by and self.fly_by_enabled:
+                radius = max(tol, self.fly_by_radius)
+                tol = radius
+
+            predicted = self.predict_move_duration(start_angles, angles, speed, radius)
+            return self.wait_for_arrival(angles, tolerance=tol, timeout=timeout,
+                                         predicted=predicted, start_angles=start_angles, sent_at=sent_at,
+                                         precise=precise and not radius)
+        return False
+
+    def travel_to(self, goal, fly_by=True):
+        """
+        沿路网中预先算好的最短时间路线飞到节点 goal
+        途经节点一律飞越；当前不在路网上时直接飞往 goal (与原先的固定走法一致)
+        """
+        start = self._at_node
+        path = self.planner.route(start, goal) if start else None
+        if path is None:
+            path = [None, goal]
+
+        for k, node in enumerate(path[1:], start=1):
+            last = k == len(path) - 1
+            self.move_to_angles_smart(self.planner.pose(node), fly_by=fly_by if last else True, label=node)
+            self._at_node = node
 
     def go_observe(self):
-        """回到抓取最高观测点 (带有极其聪明的智能防撞与防绕路逻辑)"""
+        """回到抓取最高观测点 (查表走最短时间的安全路线)"""
         if not self.is_connected: return
         
         try:
@@ -193,47 +518,65 @@ class ArmController:
             current_angles = self.mc.get_angles()
             
             if isinstance(current_angles, list) and len(current_angles) == 6:
-                target_observe = settings.PICK_POSES["observe"]
+                # 上一段下发的目标 (若是飞越途经点，机械臂此刻正朝它接近)
+                heading_to = self._last_target
+                # 实测角度作为下一段运动的起点，用于运动时长预测
+                self._last_target = list(current_angles)
                 
-                # 2. 🔥 核心修复：先计算离“最终目的地(观测点)”有多远，作为默认的最小距离！
-                min_dist = math.sqrt(sum((c - t)**2 for c, t in zip(current_angles, target_observe)))
-                closest_waypoint = None  # 如果保持为 None，说明直接回家最近
-                closest_name = "Observe Point"
+                # 2. 在点位索引中一次向量化找出最近的安全节点 (观测点 / 抓取 mid / 各槽位 high)
+                start, _ = self.planner.nearest(current_angles)
                 
-                # 3. 遍历 1~6 号槽位，看看有没有比“直接回家”更近的防撞点
-                for slot_id in range(1, 7):
-                    rack_data = settings.STORAGE_RACKS.get(slot_id)
-                    if rack_data and "high" in rack_data and sum(rack_data["high"]) != 0:
-                        target_high = rack_data["high"]
-                        
-                        dist = math.sqrt(sum((c - t)**2 for c, t in zip(current_angles, target_high)))
-                        
-                        # 如果发现离某个槽位的上方更近（说明现在正深陷在那个槽位附近）
-                        if dist < min_dist:
-                            min_dist = dist
-                            closest_waypoint = target_high
-                            closest_name = f"Slot {slot_id} High"
-                            
-                # 4. 如果找到了比直接回家更近的过渡点，才先飞去那里把手抬高！
-                if closest_waypoint:
-                    print(f"[Arm] 路径优化：当前深陷 {closest_name} 附近，先垂直退回该安全点...")
-                    self.move_to_angles_smart(closest_waypoint, self.fly_speed, self.fly_timeout)
-                else:
-                    # 如果没有触发上面的 if，说明它发现直接回家就是最短、最安全的路径
-                    pass 
+                if start != OBSERVE:
+                    path = self.planner.route(start, OBSERVE)
+                    if self.fly_by_enabled and heading_to == self.planner.pose(start):
+                        # 上一段已经以飞越方式抵达该安全点半径内，无需再退回一次
+                        self._at_node = start
+                    else:
+                        # 当前深陷在该节点附近，先退回该安全点把手抬高
+                        print(f"[Arm] 路径优化：当前深陷 {start} 附近，先退回该安全点...")
+                        self.move_to_angles_smart(self.planner.pose(start), fly_by=True, label=start)
+                        self._at_node = start
+
+                    # 3. 沿预先算好的路线经过剩余途经点 (终点观测点留给下面精确到位)
+                    for node in path[1:-1]:
+                        self.move_to_angles_smart(self.planner.pose(node), fly_by=True, label=node)
+                        self._at_node = node
                     
         except Exception as e:
             print(f"⚠️ [Arm] 智能寻路计算异常，将直接复位: {e}")
             
-        # 5. 最终平移飞回全局最高观测点
+        # 4. 最终平移飞回全局最高观测点
         print("[Arm] 正在返回最高观测点...")
-        self.move_to_angles_smart(settings.PICK_POSES["observe"], self.fly_speed, self.fly_timeout)
+        self.move_to_angles_smart(settings.PICK_POSES["observe"], label=OBSERVE)
+        self._at_node = OBSERVE
 
-    def get_input(self, pin):
+    def get_serial_stats(self):
+        """串口各指令的往返耗时与排队统计"""
+        if self.arbiter:
+            return self.arbiter.get_stats()
+        return {}
+
+    def _read_input_direct(self, pin):
         if self.is_connected:
             return self.mc.get_basic_input(pin)
         return 0
 
+    def get_input_sample(self, pin):
+        """返回 (电平, 采样时间)；快照新鲜时直接读快照，否则直接读串口"""
+        if self.inputs and self.inputs.is_fresh(pin):
+            val, ts, _ = self.inputs.get(pin)
+            return val, ts
+        return self._read_input_direct(pin), time.time()
+
+    def get_input(self, pin):
+        return self.get_input_sample(pin)[0]
+
+    def get_input_stats(self):
+        """输入快照的采样次数、失败次数与各引脚数据新鲜度"""
+        if self.inputs:
+            return self.inputs.get_stats()
+        return {}
+
     def is_start_signal_active(self):
         return self.get_input(settings.GPIO_START_BTN) == 1
 
@@ -244,41 +587,73 @@ class ArmController:
         if self.is_connected:
             print("[ARM] 🛑 触发急停！已向主板发送停止指令！")
             self.mc.stop() 
+            # 急停后实际位置未知，下一次运动退回固定等待
+            self._last_target = None
+            self._at_node = None
 
     # ================= 动作序列 =================
-    def pick(self):
+    def pick(self, next_slot=None):
+        """
+        抓取序列；给出 next_slot 时抓完直接沿最短安全路线飞往该槽位上方，
+        SAFE_DIRECT_EDGES 登记过的点对可以跳过观测点
+        """
         print("[Arm] Sequence: Picking (Smart Closed-Loop)...")
         p = settings.PICK_POSES
+        span = self.metrics.span
         self.gripper_open()
         
-        if p.get("mid"): 
-            self.move_to_angles_smart(p["mid"], self.fly_speed, self.fly_timeout)
-        self.move_to_angles_smart(p["grab"], self.speed, self.arrival_timeout)
+        # mid / observe 只是防撞途经点，飞越通过；只有 grab 需要精确闭环到位
+        with span("pick.approach"):
+            if p.get("mid"): 
+                self.travel_to(PICK_MID)
+        with span("pick.descend"):
+            self.move_to_angles_smart(p["grab"], label="grab", precise=True)
         
-        self.gripper_close()
-        # 🔥 替换普通 sleep 为 safe_sleep
-        self.safe_sleep(0.5) 
+        with span("pick.grip"):
+            # 等待时间由气爪时间模型 (GRIPPER_TIMING / 反馈引脚) 决定，期间保持急停监控
+            self.gripper_close_and_wait("grab")
         
-        if p.get("mid"): 
-            self.move_to_angles_smart(p["mid"], self.fly_speed, self.fly_timeout)
+        with span("pick.lift"):
+            if p.get("mid"): 
+                self.move_to_angles_smart(p["mid"], fly_by=True, label=PICK_MID)
+                self._at_node = PICK_MID
+            else:
+                # 没有 mid 时只能从 grab 垂直抬回观测点
+                self.move_to_angles_smart(p["observe"], fly_by=True, label=OBSERVE)
+                self._at_node = OBSERVE
             
-        self.move_to_angles_smart(p["observe"], self.fly_speed, self.fly_timeout)
+        # 抓取后紧接着就是 place，observe 在这里只是过渡点
+        with span("pick.transit"):
+            goal = slot_node(next_slot) if next_slot is not None else OBSERVE
+            self.travel_to(goal if self.planner.has(goal) else OBSERVE)
 
     def place(self, slot_id):
         print(f"[Arm] Sequence: Placing to Slot {slot_id} (Smart Closed-Loop)...")
         r = settings.STORAGE_RACKS.get(slot_id)
         if not r: return
+        span = self.metrics.span
 
-        self.move_to_angles_smart(r["high"], self.fly_speed, self.fly_timeout)
-        if r.get("mid"): 
-            self.move_to_angles_smart(r["mid"], self.fly_speed, self.fly_timeout)
-        self.move_to_angles_smart(r["low"], self.speed, self.arrival_timeout)
+        # high / mid 飞越通过，只有 low 需要精确闭环到位
+        node = slot_node(slot_id)
+        with span("place.approach"):
+            if not self.planner.has(node):
+                self.move_to_angles_smart(r["high"], fly_by=True, label=node)
+            elif self._at_node != node:
+                self.travel_to(node)
+        with span("place.descend"):
+            if r.get("mid"): 
+                self.move_to_angles_smart(r["mid"], fly_by=True, label=f"slot{slot_id}_mid")
+            self.move_to_angles_smart(r["low"], label=f"slot{slot_id}_low", precise=True)
         
-        self.gripper_open()
-        # 🔥 替换普通 sleep 为 safe_sleep
-        self.safe_sleep(0.3) 
+        with span("place.release"):
+            # 等待时间由气爪时间模型 (GRIPPER_TIMING / 反馈引脚) 决定，期间保持急停监控
+            self.gripper_open_and_wait(f"slot{slot_id}_low")
         
-        if r.get("mid"): 
-            self.move_to_angles_smart(r["mid"], self.fly_speed, self.fly_timeout)
-            
-        self.move_to_angles_smart(r["high"], self.fly_speed, self.fly_timeout)
\ No newline at end of file
+        with span("place.lift"):
+            if r.get("mid"): 
+                self.move_to_angles_smart(r["mid"], fly_by=True, label=f"slot{slot_id}_mid")
+                
+            # 退出点之后接 go_observe，同样只是途经点
+            self.move_to_angles_smart(r["high"], fly_by=True, label=node)
+            if self.planner.has(node):
+                self._at_node = node
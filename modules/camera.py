@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/camera.py
+
+import cv2
+import threading
+import time
+
+class CameraCapture:
+    """
+    独立的摄像头采集线程 (最新帧槽位)
+
+    采集线程独占 cv2.VideoCapture 并以摄像头自身的速度不断读帧，
+    槽位里永远只保留最新的一帧 (附带序号 seq 与时间戳)，旧帧直接丢弃。
+    主控制循环只需非阻塞地取最新帧，不再被摄像头延迟和 OpenCV 内部缓冲拖慢。
+    """
+
+    def __init__(self, index=0, width=640, height=480, api=cv2.CAP_DSHOW):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.api = api
+
+        self.cap = None
+        self.running = False
+        self._thread = None
+
+        # 最新帧槽位
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+
+    def start(self):
+        self.cap = cv2.VideoCapture(self.index, self.api)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        # 尽量让驱动只缓存 1 帧 (部分后端不支持，忽略即可)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="CameraCapture", daemon=True)
+        self._thread.start()
+        print(f"✅ [Camera] 采集线程已启动 (设备 {self.index}, {self.width}x{self.height})")
+        return self
+
+    def _capture_loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.1)
+                continue
+
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._timestamp = time.time()
+                self._cond.notify_all()
+
+    def latest(self):
+        """非阻塞获取最新帧，返回 (seq, timestamp, frame)；还没有任何帧时 frame 为 None"""
+        with self._cond:
+            return self._seq, self._timestamp, self._frame
+
+    def wait_next(self, last_seq, timeout=None):
+        """
+        阻塞等待一帧比 last_seq 更新的画面
+        超时返回 (last_seq, 0.0, None)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq or not self.running, timeout)
+            if self._seq <= last_seq:
+                return last_seq, 0.0, None
+            return self._seq, self._timestamp, self._frame
+
+    def release(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/cycle_metrics.py
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+class CycleMetrics:
+    """
+    搬运节拍分段计时
+
+    用 with metrics.span("pick.descend"): ... 包住每个动作阶段，耗时按 (槽位, 阶段) 存入内存中的环形样本表，
+    随时可以查询每个阶段的 p50 / p95 / max。
+    槽位由外层的 with metrics.cycle(slot_id): 设定 (线程局部)，内层的 ArmController 无需知道当前槽位；
+    不在任何 cycle 内的计时 (如开机复位) 记到 "-" 下。
+    """
+
+    NO_SLOT = "-"
+
+    def __init__(self, max_samples=500):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = {}      # {(slot, phase): deque[秒]}
+        self._local = threading.local()
+
+    def _current_slot(self):
+        return getattr(self._local, "slot", self.NO_SLOT)
+
+    @contextmanager
+    def cycle(self, slot_id):
+        """标记当前线程正在为 slot_id 搬运，期间所有 span 记到该槽位下"""
+        previous = self._current_slot()
+        self._local.slot = slot_id
+        try:
+            yield
+        finally:
+            self._local.slot = previous
+
+    @contextmanager
+    def span(self, phase):
+        """计时一个阶段；阶段内抛出异常 (如急停) 同样记录已消耗的时间"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - t0)
+
+    def record(self, phase, seconds, slot=None):
+        key = (slot if slot is not None else self._current_slot(), phase)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+    def report(self, slot=None):
+        """
+        返回 {槽位: {阶段: {count, p50_ms, p95_ms, max_ms}}}
+        指定 slot 时只返回该槽位
+        """
+        with self._lock:
+            items = [(k, np.array(v)) for k, v in self._samples.items()]
+
+        result = {}
+        for (slot_id, phase), values in items:
+            if slot is not None and slot_id != slot:
+                continue
+            p50, p95 = np.percentile(values, [50, 95])
+            result.setdefault(str(slot_id), {})[phase] = {
+                "count": int(len(values)),
+                "p50_ms": round(float(p50) * 1000, 1),
+                "p95_ms": round(float(p95) * 1000, 1),
+                "max_ms": round(float(values.max()) * 1000, 1),
+            }
+
+        return {slot_id: dict(sorted(phases.items())) for slot_id, phases in sorted(result.items())}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/frame_recorder.py
+
+import struct
+import time
+import numpy as np
+
+# ================= 录像文件格式 (.cfr) =================
+# [文件头 64 字节]
+#   magic(8) version(u32) height(u32) width(u32) channels(u32) label_len(u32) flags(u32) 其余补零
+# [数据块 CHNK] * N，每块:
+#   magic(4) count(u32)
+#   timestamps: count x float64
+#   labels:     count x label_len 字节 (utf-8, 末尾补 \0)
+#   pixels:     count x H x W x C uint8
+#   补齐到 8 字节边界
+# 所有数据都可以直接用 np.memmap 映射读取，无需解码。
+
+FILE_MAGIC = b"CSFRAME1"
+CHUNK_MAGIC = b"CHNK"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+HEADER_STRUCT = struct.Struct("<8sIIIIII")
+CHUNK_STRUCT = struct.Struct("<4sI")
+
+FLAG_ROI_CROP = 0x1  # 录制的是 ROI 裁切图而不是整帧
+
+def _pad8(n):
+    return (8 - n % 8) % 8
+
+class FrameRecorder:
+    """
+    分块录制画面到紧凑的二进制文件
+
+    每帧附带时间戳和可选标签 (例如 'red' / 'none')，攒满 chunk_size 帧写一个数据块，
+    用于离线回放基准测试 (tools/vision_benchmark.py)。
+    """
+
+    def __init__(self, path, chunk_size=64, label_len=16, roi_crop=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.label_len = label_len
+        self.flags = FLAG_ROI_CROP if roi_crop else 0
+
+        self.shape = None
+        self.frame_count = 0
+        self._file = open(path, "wb")
+        self._pending = []  # [(timestamp, label_bytes, frame)]
+
+    def write(self, frame, timestamp=None, label=None):
+        if self.shape is None:
+            if frame.ndim == 2:
+                frame = frame[:, :, None]
+            self.shape = frame.shape
+            self._write_header()
+        elif frame.ndim == 2:
+            frame = frame[:, :, None]
+
+        if frame.shape != self.shape or frame.dtype != np.uint8:
+            raise ValueError(f"帧尺寸/类型不一致: 期望 {self.shape} uint8，实际 {frame.shape} {frame.dtype}")
+
+        label_bytes = (label or "").encode("utf-8")[:self.label_len]
+        ts = timestamp if timestamp is not None else time.time()
+        # 必须复制：摄像头线程会复用 / 覆盖原始画面
+        self._pending.append((ts, label_bytes, np.ascontiguousarray(frame).copy()))
+        self.frame_count += 1
+
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def _write_header(self):
+        h, w, c = self.shape
+        header = HEADER_STRUCT.pack(FILE_MAGIC, FORMAT_VERSION, h, w, c, self.label_len, self.flags)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def flush(self):
+        if not self._pending:
+            return
+        n = len(self._pending)
+        timestamps = np.array([p[0] for p in self._pending], dtype="<f8")
+        labels = np.zeros((n, self.label_len), dtype=np.uint8)
+        for i, (_, label_bytes, _) in enumerate(self._pending):
+            labels[i, :len(label_bytes)] = np.frombuffer(label_bytes, dtype=np.uint8)
+        pixels = np.stack([p[2] for p in self._pending])
+
+        body = CHUNK_STRUCT.pack(CHUNK_MAGIC, n) + timestamps.tobytes() + labels.tobytes() + pixels.tobytes()
+        self._file.write(body + b"\0" * _pad8(len(body)))
+        self._file.flush()
+        self._pending = []
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class FrameReader:
+    """
+    以内存映射方式读取 .cfr 录像文件
+    frames 直接是 memmap 上的只读视图，不会把整个文件读进内存
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._mm) < HEADER_SIZE:
+            raise ValueError(f"不是有效的录像文件: {path}")
+
+        magic, version, h, w, c, label_len, flags = HEADER_STRUCT.unpack(bytes(self._mm[:HEADER_STRUCT.size]))
+        if magic != FILE_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"不支持的录像文件格式: {path}")
+
+        self.shape = (h, w, c)
+        self.label_len = label_len
+        self.flags = flags
+        self.roi_crop = bool(flags & FLAG_ROI_CROP)
+
+        # 扫描所有数据块，建立 (timestamps, labels, frames) 视图索引
+        self._chunks = []
+        frame_bytes = h * w * c
+        offset = HEADER_SIZE
+        while offset + CHUNK_STRUCT.size <= len(self._mm):
+            chunk_magic, n = CHUNK_STRUCT.unpack(bytes(self._mm[offset:offset + CHUNK_STRUCT.size]))
+            if chunk_magic != CHUNK_MAGIC:
+                break
+            body = CHUNK_STRUCT.size + n * (8 + label_len + frame_bytes)
+            if offset + body > len(self._mm):
+                break  # 录制中断导致的残缺块，忽略
+
+            pos = offset + CHUNK_STRUCT.size
+            ts = self._mm[pos:pos + n * 8].view("<f8")
+            pos += n * 8
+            labels = self._mm[pos:pos + n * label_len].reshape(n, label_len)
+            pos += n * label_len
+            frames = self._mm[pos:pos + n * frame_bytes].reshape(n, h, w, c)
+            self._chunks.append((ts, labels, frames))
+
+            offset += body + _pad8(body)
+
+        self._starts = np.cumsum([0] + [len(c[0]) for c in self._chunks])
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def _locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        chunk = int(np.searchsorted(self._starts, index, side="right")) - 1
+        return self._chunks[chunk], index - int(self._starts[chunk])
+
+    @staticmethod
+    def _decode_label(raw):
+        return bytes(raw).rstrip(b"\0").decode("utf-8", errors="replace") or None
+
+    def __getitem__(self, index):
+        """返回 (timestamp, label, frame)"""
+        (ts, labels, frames), i = self._locate(index)
+        return float(ts[i]), self._decode_label(labels[i]), frames[i]
+
+    def __iter__(self):
+        for ts, labels, frames in self._chunks:
+            for i in range(len(ts)):
+                yield float(ts[i]), self._decode_label(labels[i]), frames[i]
+
+    def labels(self):
+        return [label for _, label, _ in self]
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/input_snapshot.py
+
+import time
+import threading
+
+class InputSnapshot:
+    """
+    GPIO 输入快照服务
+
+    由一个后台线程按固定周期依次采样所有输入引脚 (G35 / G36 ...)，
+    把 (电平, 采样时间, 采样序号) 发布到快照表中。
+    主循环的消抖逻辑与运动中的急停监控都只读快照，不再各自发起串口读取，
+    串口上的 GPIO 读取频率从 "调用方数量 x 调用频率" 降为固定的 "引脚数 / 采样周期"。
+
+    采样本身也受串口预算约束，不会挤占运动与角度轮询：
+    - 一轮采样的读取耗时超过 budget x 周期时自动拉长这一轮 (读取占用串口的时间比例不超过 budget)；
+    - 每次读取前若仲裁队列里有其他指令在等，先让出串口，最多让到本轮周期结束 (保证采样不会无限推迟)。
+    """
+
+    def __init__(self, read_fn, pins, period=0.03, budget=1.0, pending_fn=None):
+        """
+        read_fn:    实际读取单个引脚的函数，返回 0/1，读取失败返回 None 或 -1
+        pins:       需要采样的引脚列表
+        period:     一轮采样的周期 (秒)，即采样频率上限
+        budget:     采样读取占用串口时间的比例上限 (0~1]，1 表示只受周期限制
+        pending_fn: 返回串口队列中等待执行的指令数，为 None 时不让出
+        """
+        self.read_fn = read_fn
+        self.pins = list(pins)
+        self.period = period
+        self.budget = min(1.0, max(0.05, budget))
+        self.pending_fn = pending_fn
+        self.cycle_time = period    # 最近一轮的实际周期 (受预算拉长后可能大于 period)
+        self.busy_time = 0.0        # 累计读取耗时
+        self.deferred_count = 0     # 因队列中有其他指令而让出的次数
+        self._started_at = 0.0
+
+        self._cond = threading.Condition()
+        # {pin: (value, timestamp, seq)}，从未采样成功时 value 为 None
+        self._samples = {pin: (None, 0.0, 0) for pin in self.pins}
+        self.sample_count = 0
+        self.error_count = 0
+
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="InputSnapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            cycle_start = time.time()
+            busy = 0.0
+            for pin in list(self.pins):
+                self._yield_to_queue(cycle_start + self.period)
+                read_start = time.time()
+                try:
+                    val = self.read_fn(pin)
+                except Exception:
+                    val = None
+                now = time.time()
+                busy += now - read_start
+
+                if val is None or val == -1:
+                    self.error_count += 1
+                    continue
+
+                with self._cond:
+                    seq = self._samples[pin][2] + 1
+                    self._samples[pin] = (int(val), now, seq)
+                    self.sample_count += 1
+                    self._cond.notify_all()
+
+            self.busy_time += busy
+            self.cycle_time = max(self.period, busy / self.budget)
+            time.sleep(max(0.0, self.cycle_time - (time.time() - cycle_start)))
+
+    def _yield_to_queue(self, deadline):
+        """队列中有其他指令在等时先让出串口，最多等到 deadline"""
+        if self.pending_fn is None or self.pending_fn() == 0:
+            return
+        self.deferred_count += 1
+        while self.running and time.time() < deadline and self.pending_fn() > 0:
+            time.sleep(0.001)
+
+    @property
+    def interval(self):
+        """同一引脚两次采样的间隔上限估计 (名义周期与实际周期取大)"""
+        return max(self.period, self.cycle_time)
+
+    def set_pins(self, pins):
+        """运行中更换采样引脚；移除的引脚保留最后一次采样 (随时间自然过期)，新增的引脚从下一轮开始采样"""
+        with self._cond:
+            for pin in pins:
+                self._samples.setdefault(pin, (None, 0.0, 0))
+            self.pins = list(pins)
+
+    def get(self, pin):
+        """返回引脚最新的 (value, timestamp, seq)"""
+        with self._cond:
+            return self._samples.get(pin, (None, 0.0, 0))
+
+    def is_fresh(self, pin, max_age=None):
+        """快照是否在 max_age 秒内更新过 (默认 3 个实际采样周期)"""
+        if max_age is None:
+            max_age = self.interval * 3
+        _, ts, _ = self.get(pin)
+        return self.running and ts > 0 and time.time() - ts <= max_age
+
+    def wait_newer(self, pin, after_seq, timeout):
+        """等待引脚出现比 after_seq 更新的采样，超时返回 None"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                sample = self._samples.get(pin, (None, 0.0, 0))
+                if sample[2] > after_seq:
+                    return sample
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def get_stats(self):
+        now = time.time()
+        with self._cond:
+            pins = {
+                str(pin): {"value": v, "age_ms": round((now - ts) * 1000, 1) if ts else None, "seq": seq}
+                for pin, (v, ts, seq) in self._samples.items() if pin in self.pins
+            }
+        elapsed = now - self._started_at if self._started_at else 0.0
+        return {
+            "period": self.period,
+            "cycle_ms": round(self.cycle_time * 1000, 1),
+            "budget": self.budget,
+            "link_share": round(self.busy_time / elapsed, 3) if elapsed > 0 else 0.0,
+            "deferred": self.deferred_count,
+            "samples": self.sample_count,
+            "errors": self.error_count,
+            "pins": pins,
+        }
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/motion_planner.py
+
+import numpy as np
+
+OBSERVE = "observe"
+PICK_MID = "pick_mid"
+
+def slot_node(slot_id):
+    """槽位上方安全点在路网中的节点名"""
+    return f"slot{slot_id}_high"
+
+class MotionPlanner:
+    """
+    点位索引 + 安全路网
+
+    启动时把 settings 中的所有点位一次性载入 NumPy 数组 (N x 6)，
+    并以 "observe / pick_mid / 各槽位 high" 为节点建立一张小图：
+    - 默认安全边：observe <-> pick_mid、observe <-> 每个槽位 high (与原先固定走法一致)
+    - SAFE_DIRECT_EDGES 中登记的点对额外连边 (如 pick_mid <-> slot1_high)，可以跳过观测点
+    边权为按飞越速度预测的运动时长，用 Floyd-Warshall 预先算好所有点对的最短时间路线，
+    运行时查表即可，不再逐次计算距离。
+    """
+
+    def __init__(self, pick_poses, storage_racks, speed, deg_per_sec_per_speed=1.6,
+                 motion_startup=0.15, direct_edges=()):
+        names = []
+        poses = []
+
+        names.append(OBSERVE)
+        poses.append(pick_poses[OBSERVE])
+        if pick_poses.get("mid"):
+            names.append(PICK_MID)
+            poses.append(pick_poses["mid"])
+
+        for slot_id in sorted(storage_racks):
+            high = storage_racks[slot_id].get("high")
+            # 全 0 表示该槽位尚未示教，不参与路网
+            if high and sum(high) != 0:
+                names.append(slot_node(slot_id))
+                poses.append(high)
+
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.poses = np.array(poses, dtype=np.float64)
+
+        n = len(names)
+        edges = [(OBSERVE, name) for name in names if name != OBSERVE]
+        edges += [tuple(e) for e in direct_edges]
+
+        # 边权：最大关节位移 / 飞越角速度 + 启动延迟 (与 ArmController.predict_move_duration 同一模型)
+        cost = np.full((n, n), np.inf)
+        np.fill_diagonal(cost, 0.0)
+        for a, b in edges:
+            if a not in self.index or b not in self.index:
+                print(f"⚠️ [Planner] 忽略未知的安全边: {a} <-> {b}")
+                continue
+            i, j = self.index[a], self.index[b]
+            distance = np.abs(self.poses[i] - self.poses[j]).max()
+            cost[i, j] = cost[j, i] = motion_startup + distance / (speed * deg_per_sec_per_speed)
+
+        # Floyd-Warshall：节点只有十来个，启动时算一次即可
+        next_hop = np.where(np.isfinite(cost), np.arange(n)[None, :], -1)
+        for k in range(n):
+            via = cost[:, k:k + 1] + cost[k:k + 1, :]
+            better = via < cost
+            cost = np.where(better, via, cost)
+            next_hop = np.where(better, next_hop[:, k:k + 1], next_hop)
+
+        self.cost = cost
+        self._next = next_hop
+
+    def pose(self, name):
+        return self.poses[self.index[name]].tolist()
+
+    def has(self, name):
+        return name in self.index
+
+    def nearest(self, angles):
+        """返回离给定角度最近的路网节点名及其欧氏距离 (度)"""
+        dists = np.sqrt(((self.poses - np.asarray(angles, dtype=np.float64)) ** 2).sum(axis=1))
+        i = int(np.argmin(dists))
+        return self.names[i], float(dists[i])
+
+    def route(self, start, goal):
+        """
+        查表得到从 start 到 goal 的最短时间节点序列 (含首尾)
+        不连通时返回 None
+        """
+        i, j = self.index[start], self.index[goal]
+        if i == j:
+            return [start]
+        if self._next[i, j] < 0:
+            return None
+        path = [start]
+        while i != j:
+            i = int(self._next[i, j])
+            path.append(self.names[i])
+        return path
+
+    def route_time(self, start, goal):
+        return float(self.cost[self.index[start], self.index[goal]])
@@ -14,105 +14,390 @@
 import snap7
 from snap7.util import get_bool
 import time
+import queue
+import random
+import threading
+
+# 默认 DB 位地址表: 名称 -> (字节, 位)
+DEFAULT_TAGS = {
+    # --- Byte 0 (Slot 1-4) --- 映射关系: 1->0.4, 2->0.5, 3->0.6, 4->0.7
+    "slot1": (0, 4),
+    "slot2": (0, 5),
+    "slot3": (0, 6),
+    "slot4": (0, 7),
+    # --- Byte 1 (Slot 5-6) --- 映射关系: 5->1.0, 6->1.1
+    "slot5": (1, 0),
+    "slot6": (1, 1),
+    # IoT -> PLC: 推出盒子 (DB1.DBX4.4)
+    "iot_start": (4, 4),
+}
 
 class PLCClient:
-    def __init__(self, ip='192.168.0.10', rack=0, slot=1, db_number=1):
+    """
+    S7 PLC 以太网客户端
+
+    连接状态机: DISCONNECTED -> CONNECTING -> CONNECTED，连接失败或读写异常后进入 BACKOFF，
+    按指数退避 (带随机抖动) 等待下一次重连；等待期间所有读写立即返回失败，不再每次都卡满 TCP 连接超时。
+    重连只在 ensure_connected() 中发生，由后台轮询线程 (PLCPoller) 驱动，控制线程上的写操作只检查状态。
+
+    位写入 (write_bit / pulse_bit) 只入队、立即返回，由写线程批量取出，同一字节的多个位合并成一次 db_write；
+    每一批里每个字节先读一次 PLC 的当前值，只改动本批写入的位再写回 (读-改-写)，
+    PLC 侧在同一字节里改动的其余位不会被覆盖。脉冲的下降沿由定时器入队。
+    连接状态的切换 (连接 / 失败退避) 与 snap7 调用共用同一把锁，写线程与轮询线程不会交错修改状态。
+
+    所有位地址由标签表 (DEFAULT_TAGS + settings.PLC_TAGS) 声明，read_tags() 用一次连续的 db_read
+    读出覆盖全部标签的字节区间，库存与握手信号 (启动许可 / 复位请求) 来自同一次读取。
+    """
+
+    DISCONNECTED = "DISCONNECTED"
+    CONNECTING = "CONNECTING"
+    CONNECTED = "CONNECTED"
+    BACKOFF = "BACKOFF"
+
+    def __init__(self, ip='192.168.0.10', rack=0, slot=1, db_number=1, tcp_port=102,
+                 backoff_initial=0.5, backoff_max=30.0, backoff_jitter=0.2, down_after=3,
+                 iot_start_pulse=0.5, tags=None):
+        """
+        tcp_port:                      S7 端口，真实 PLC 为 102；连本地仿真 PLC (tools/plc_emulator.py) 时改为其端口
+        backoff_initial / backoff_max: 重连退避的初始与最大等待时间 (秒)，每次失败翻倍
+        backoff_jitter:                退避时间的随机抖动比例 (0.2 = ±20%)
+        down_after:                    连续失败达到该次数后健康状态由 degraded 变为 down
+        iot_start_pulse:               IOTstart 脉冲宽度 (秒)
+        tags:                          额外 / 覆盖的位地址 {名称: (字节, 位)}，与 DEFAULT_TAGS 合并
+        """
         self.ip = ip
         self.rack = rack
         self.slot = slot
         self.db_number = db_number
+        self.tcp_port = tcp_port
+        self.tags = dict(DEFAULT_TAGS, **(tags or {}))
+        # 一次读取覆盖全部标签的最小连续字节区间
+        self._tag_start = min(byte for byte, _ in self.tags.values())
+        self._tag_size = max(byte for byte, _ in self.tags.values()) - self._tag_start + 1
         self.client = snap7.client.Client()
-        self.connected = False
+        # snap7 客户端不是线程安全的：后台轮询线程与主线程的读写都要串行化
+        self._lock = threading.RLock()
+
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_jitter = backoff_jitter
+        self.down_after = down_after
+
+        self.state = self.DISCONNECTED
+        self.consecutive_failures = 0
+        self.next_retry = 0.0
+        self.last_error = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+        self.iot_start_pulse = iot_start_pulse
+        # 位写入队列: (db, 字节, 位, 值)
+        self._write_queue = queue.Queue()
+        self._pulse_lock = threading.Lock()
+        self._pulse_timers = {}     # {(db, 字节, 位): threading.Timer}
+        self.coalesced_writes = 0
+        self.dropped_writes = 0
+        self._writer = threading.Thread(target=self._writer_loop, name="PLCWriter", daemon=True)
+        self._writer.start()
         
         # 尝试初次连接
         self._connect()
 
+    @property
+    def connected(self):
+        return self.state == self.CONNECTED
+
     def _connect(self):
-        """内部连接方法"""
-        try:
-            if self.client.get_connected():
+        """内部连接方法，返回是否连接成功；失败后按退避时间安排下一次重连"""
+        with self._lock:
+            # 等锁期间另一个线程可能已经连上
+            if self.state == self.CONNECTED:
+                return True
+            self.state = self.CONNECTING
+            start = time.perf_counter()
+            ok = False
+            try:
+                if not self.client.get_connected():
+                    self.client.connect(self.ip, self.rack, self.slot, self.tcp_port)
+                ok = self.client.get_connected()
+                if not ok:
+                    self.last_error = "connect returned without connection"
+            except Exception as e:
+                self.last_error = str(e)
+            self._record("connect", time.perf_counter() - start, ok)
+
+            if ok:
+                if self.consecutive_failures:
+                    print(f"✅ [PLC] 第 {self.consecutive_failures + 1} 次尝试后已重新连接到 {self.ip} (DB{self.db_number})")
+                else:
+                    print(f"✅ [PLC] 已连接到 {self.ip}:{self.tcp_port} (DB{self.db_number})")
+                self.state = self.CONNECTED
+                self.consecutive_failures = 0
+                self.last_error = None
+                return True
+
+            delay = self._schedule_retry()
+        print(f"❌ [PLC] 连接失败: {self.ip} ({self.last_error})，{delay:.1f} 秒后重试")
+        return False
+
+    def _schedule_retry(self):
+        """进入退避状态，返回到下一次重连的等待时间 (秒)"""
+        with self._lock:
+            self.consecutive_failures += 1
+            delay = min(self.backoff_max, self.backoff_initial * (2 ** (self.consecutive_failures - 1)))
+            delay *= 1.0 + random.uniform(-self.backoff_jitter, self.backoff_jitter)
+            self.next_retry = time.time() + delay
+            self.state = self.BACKOFF
+            return delay
+
+    def _mark_failed(self, e):
+        """读写异常：断开底层连接并进入退避，下一次读写由 ensure_connected 负责重连"""
+        with self._lock:
+            self.last_error = str(e)
+            # 另一个线程已经为同一次断线进入退避，不重复累计失败次数
+            if self.state != self.CONNECTED:
                 return
-            self.client.connect(self.ip, self.rack, self.slot)
-            self.connected = self.client.get_connected()
-            if self.connected:
-                print(f"✅ [PLC] 已连接到 {self.ip} (DB{self.db_number})")
-            else:
-                print(f"❌ [PLC] 连接失败: {self.ip}")
-        except Exception as e:
-            print(f"❌ [PLC] 连接异常: {e}")
-            self.connected = False
+            try:
+                self.client.disconnect()
+            except Exception:
+                pass
+            self._schedule_retry()
+
+    def ensure_connected(self):
+        """
+        已连接返回 True；退避期内立即返回 False；退避到期则尝试一次重连
+        会阻塞 TCP 连接超时，只应在后台线程中调用
+        """
+        if self.state == self.CONNECTED:
+            return True
+        if self.state == self.CONNECTING:
+            return False
+        if self.state == self.BACKOFF and time.time() < self.next_retry:
+            return False
+        return self._connect()
+
+    def health(self):
+        """ok = 已连接；degraded = 正在重连；down = 连续失败达到 down_after 次"""
+        if self.state == self.CONNECTED:
+            return "ok"
+        if self.consecutive_failures < self.down_after:
+            return "degraded"
+        return "down"
+
+    def _record(self, name, seconds, ok):
+        with self._stats_lock:
+            st = self._stats.setdefault(name, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            st["count"] += 1
+            if not ok:
+                st["errors"] += 1
+            st["total"] += seconds
+            st["max"] = max(st["max"], seconds)
+            st["last"] = seconds
+
+    def get_stats(self):
+        """连接 / 读 / 写的次数、失败次数与耗时 (毫秒)，以及当前连接状态"""
+        with self._stats_lock:
+            report = {}
+            for name, st in self._stats.items():
+                n = st["count"]
+                report[name] = {
+                    "count": n,
+                    "errors": st["errors"],
+                    "avg_ms": round(st["total"] / n * 1000, 2),
+                    "max_ms": round(st["max"] * 1000, 2),
+                    "last_ms": round(st["last"] * 1000, 2),
+                }
+        report["_state"] = self.state
+        report["_health"] = self.health()
+        report["_consecutive_failures"] = self.consecutive_failures
+        report["_retry_in_s"] = round(max(0.0, self.next_retry - time.time()), 2) if self.state == self.BACKOFF else None
+        report["_last_error"] = self.last_error
+        report["_write_queue"] = self._write_queue.qsize()
+        report["_coalesced_writes"] = self.coalesced_writes
+        report["_dropped_writes"] = self.dropped_writes
+        return report
+
+    def write_bit(self, byte, bit, value, db=None):
+        """
+        写 DBx.DBX<byte>.<bit>，只入队、不阻塞调用线程
+        未连接时直接丢弃并返回 False (断线期间积压的指令不应在重连后补发)
+        """
+        if not self.connected:
+            self.dropped_writes += 1
+            return False
+        self._write_queue.put((db if db is not None else self.db_number, byte, bit, bool(value)))
+        return True
+
+    def pulse_bit(self, byte, bit, duration, db=None):
+        """
+        输出一个 duration 秒的高电平脉冲，下降沿由定时器入队
+        同一个位上一个脉冲未结束时再次触发，则从现在起重新计时 (不会提前拉低)
+        """
+        db = db if db is not None else self.db_number
+        key = (db, byte, bit)
+        with self._pulse_lock:
+            timer = self._pulse_timers.pop(key, None)
+            if timer:
+                timer.cancel()
+            if not self.write_bit(byte, bit, True, db=db):
+                return False
+            timer = threading.Timer(duration, self._end_pulse, args=(key,))
+            timer.daemon = True
+            self._pulse_timers[key] = timer
+            timer.start()
+        return True
+
+    def _end_pulse(self, key):
+        with self._pulse_lock:
+            self._pulse_timers.pop(key, None)
+        db, byte, bit = key
+        # 脉冲期间断线也要尽量拉低：不经过 write_bit 的连接检查，由写线程决定能否写出
+        self._write_queue.put((db, byte, bit, False))
+
+    def _writer_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            # 取出当前积压的所有写入，一起处理
+            batch = [item]
+            stop = False
+            while True:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        """
+        同一字节的位写入合并成一次读-改-写；同一个位在一批里先后出现时先写出前一次，保证脉冲不被吞掉
+        """
+        if not self.connected:
+            self.dropped_writes += len(batch)
+            return
+
+        # 按字节分组并保持顺序: {(db, 字节): [[(位, 值), ...], ...]}，每个子列表里同一个位最多出现一次
+        groups = {}
+        for db, byte, bit, value in batch:
+            rounds = groups.setdefault((db, byte), [[]])
+            if any(b == bit for b, _ in rounds[-1]):
+                rounds.append([])
+            rounds[-1].append((bit, value))
+
+        writes = 0
+        for key, rounds in groups.items():
+            for bits in rounds:
+                if not self._update_byte(key, bits):
+                    self.dropped_writes += len(bits)
+                    continue
+                writes += 1
+        self.coalesced_writes += max(0, len(batch) - writes)
+
+    def _update_byte(self, key, bits):
+        """读出字节当前值，只改动 bits 中的位后写回 (在同一把锁内完成)，返回是否成功"""
+        db, byte = key
+        with self._lock:
+            if not self.connected:
+                return False
+            start = time.perf_counter()
+            try:
+                data = self.client.db_read(db, byte, 1)
+                self._record("read", time.perf_counter() - start, True)
+            except Exception as e:
+                self._record("read", time.perf_counter() - start, False)
+                print(f"⚠️ [PLC] 读取 DB{db}.DBB{byte} 失败: {e}")
+                self._mark_failed(e)
+                return False
+
+            value = data[0]
+            for bit, on in bits:
+                value = value | (1 << bit) if on else value & ~(1 << bit)
+
+            start = time.perf_counter()
+            try:
+                self.client.db_write(db, byte, bytearray([value]))
+                self._record("write", time.perf_counter() - start, True)
+            except Exception as e:
+                self._record("write", time.perf_counter() - start, False)
+                print(f"❌ [PLC] 写入 DB{db}.DBB{byte} 异常: {e}")
+                self._mark_failed(e)
+                return False
+        return True
 
     def send_iot_start(self):
         """
         触发 PLC 推出盒子 (地址 DB1.DBX4.4)
-        逻辑: 写 True -> 保持 0.5 秒 -> 写 False (模拟按键脉冲)
+        逻辑: 写 True -> 保持 iot_start_pulse 秒 -> 写 False (模拟按键脉冲)，由写线程与定时器完成，立即返回
         """
-        if not hasattr(self, 'client') or not self.client.get_connected():
-            print("[PLC] ⚠️ 未连接到 PLC，无法发送 IOTstart 信号")
-            return False
-            
-        try:
-            # 读取 DB1 的第 4 个字节 (长度为 1)
-            data = self.client.db_read(1, 4, 1)
-            
-            # 将第 4 位的状态改为 True (1)
-            import snap7.util
-            snap7.util.set_bool(data, 0, 4, True)
-            self.client.db_write(1, 4, data)
-            print("[PLC] 🟢 已向 DB1.DBX4.4 发送 IOTstart 启动信号！")
-            
-            # 保持 0.5 秒让 PLC 稳定读取
-            import time
-            time.sleep(0.5)
-            
-            # 恢复为 False (0)，防止 PLC 一直往外推盒子
-            snap7.util.set_bool(data, 0, 4, False)
-            self.client.db_write(1, 4, data)
-            
-            return True
-            
-        except Exception as e:
-            print(f"[PLC] ❌ 发送 IOTstart 异常: {e}")
+        # 只检查状态，不在调用线程上重连
+        byte, bit = self.tags["iot_start"]
+        if not self.pulse_bit(byte, bit, self.iot_start_pulse):
+            print(f"[PLC] ⚠️ 未连接到 PLC ({self.health()})，无法发送 IOTstart 信号")
             return False
+        print(f"[PLC] 🟢 已向 DB{self.db_number}.DBX{byte}.{bit} 发送 IOTstart 启动信号！")
+        return True
     
-    def get_slots_status(self):
+    def read_tags(self):
         """
-        读取 6 个槽位的状态
-        返回字典: {1: 1, 2: 0, ...} (1=满, 0=空)
+        一次 db_read 读出全部标签
+        返回字典: {"slot1": 1, ..., "iot_start": 0, ...}
         如果通讯失败，返回 None
         """
-        if not self.connected:
-            self._connect()
-            if not self.connected:
-                return None
+        if not self.ensure_connected():
+            return None
 
+        start = time.perf_counter()
         try:
-            # 读取 DB1, 从 0 开始, 读 2 个字节
-            # 你的测试代码：client.db_read(db_number, 0, 2)
-            data = self.client.db_read(self.db_number, 0, 2)
-            
-            status = {}
-
-            # --- Byte 0 (Slot 1-4) ---
-            # 映射关系: 1->0.4, 2->0.5, 3->0.6, 4->0.7
-            status[1] = 1 if get_bool(data, 0, 4) else 0
-            status[2] = 1 if get_bool(data, 0, 5) else 0
-            status[3] = 1 if get_bool(data, 0, 6) else 0
-            status[4] = 1 if get_bool(data, 0, 7) else 0
-
-            # --- Byte 1 (Slot 5-6) ---
-            # 映射关系: 5->1.0, 6->1.1
-            status[5] = 1 if get_bool(data, 1, 0) else 0
-            status[6] = 1 if get_bool(data, 1, 1) else 0
-            
-            return status
-            
+            with self._lock:
+                data = self.client.db_read(self.db_number, self._tag_start, self._tag_size)
+            self._record("read", time.perf_counter() - start, True)
         except Exception as e:
+            self._record("read", time.perf_counter() - start, False)
             print(f"⚠️ [PLC] 读取错误: {e}")
-            self.connected = False # 标记断开，下次自动重连
+            self._mark_failed(e) # 标记断开，退避后由 ensure_connected 自动重连
             return None
 
+        return {name: 1 if get_bool(data, byte - self._tag_start, bit) else 0
+                for name, (byte, bit) in self.tags.items()}
+
+    @staticmethod
+    def slots_from_tags(tags):
+        """从标签读数中取出 6 个槽位的状态 {1: 1, 2: 0, ...}"""
+        return {i: tags[f"slot{i}"] for i in range(1, 7) if f"slot{i}" in tags}
+
+    def get_slots_status(self):
+        """
+        读取 6 个槽位的状态
+        返回字典: {1: 1, 2: 0, ...} (1=满, 0=空)
+        如果通讯失败，返回 None
+        """
+        tags = self.read_tags()
+        if tags is None:
+            return None
+        return self.slots_from_tags(tags)
+
     def close(self):
+        # 未结束的脉冲立即拉低，等写线程把队列写完再断开
+        with self._pulse_lock:
+            timers = list(self._pulse_timers.items())
+            self._pulse_timers.clear()
+        for key, timer in timers:
+            timer.cancel()
+            db, byte, bit = key
+            self._write_queue.put((db, byte, bit, False))
+        self._write_queue.put(None)
+        self._writer.join(timeout=2.0)
+
         if self.connected:
-            self.client.disconnect()
+            with self._lock:
+                self.client.disconnect()
+            self.state = self.DISCONNECTED
             print("[PLC] 连接已关闭")
\ No newline at end of file
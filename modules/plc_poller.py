@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/plc_poller.py
+
+import time
+import threading
+from collections import deque
+
+class PLCPoller:
+    """
+    PLC 库存后台轮询
+
+    由一个后台线程按固定周期调用 PLCClient.read_tags() (一次 db_read 读出全部标签)，
+    把 (库存字典, 读取时间, 读取序号) 与全部标签的读数发布到缓存中，主循环与 /status 都只读缓存，
+    snap7 的网络读写 (包括断线重连) 不再阻塞控制线程。
+    槽位状态发生变化时调用已注册的回调 callback(slot_id, old, new, timestamp)，
+    最近的变化事件同时保存在 events 中供网页查询。
+    """
+
+    def __init__(self, plc, period=0.2, stale_after=1.0, max_events=50):
+        """
+        plc:         PLCClient 实例
+        period:      轮询周期 (秒)
+        stale_after: 缓存超过该时间 (秒) 未更新即视为过期
+        """
+        self.plc = plc
+        self.period = period
+        self.stale_after = stale_after
+
+        self._lock = threading.Lock()
+        self._inventory = None      # 从未读取成功时为 None
+        self._tags = {}             # 最近一次读取的全部标签 {名称: 0/1}
+        self._timestamp = 0.0
+        self._seq = 0
+        self._callbacks = []
+        self.events = deque(maxlen=max_events)     # [(时间戳, 槽位, 旧值, 新值)]
+        self.read_count = 0
+        self.error_count = 0
+
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name="PLCPoller", daemon=True)
+            self._thread.start()
+        return self
+
+    def on_change(self, callback):
+        """注册槽位变化回调 callback(slot_id, old, new, timestamp)，在轮询线程中调用"""
+        self._callbacks.append(callback)
+        return callback
+
+    def _run(self):
+        while self.running:
+            cycle_start = time.time()
+            try:
+                tags = self.plc.read_tags()
+            except Exception:
+                tags = None
+            now = time.time()
+
+            if tags is None:
+                self.error_count += 1
+            else:
+                self._publish(tags, now)
+
+            time.sleep(max(0.0, self.period - (time.time() - cycle_start)))
+
+    def _publish(self, tags, now):
+        status = self.plc.slots_from_tags(tags)
+        with self._lock:
+            previous = self._inventory
+            self._inventory = status
+            self._tags = dict(tags)
+            self._timestamp = now
+            self._seq += 1
+            self.read_count += 1
+
+        # 首次读取只建立基准，不产生变化事件
+        if previous is None:
+            return
+        for slot_id, new in status.items():
+            old = previous.get(slot_id)
+            if old == new:
+                continue
+            self.events.append((now, slot_id, old, new))
+            for callback in list(self._callbacks):
+                try:
+                    callback(slot_id, old, new, now)
+                except Exception as e:
+                    print(f"⚠️ [PLC] 槽位变化回调异常: {e}")
+
+    def get(self):
+        """返回最新的 (库存字典副本, 读取时间, 读取序号)，从未读取成功时库存为 None"""
+        with self._lock:
+            inventory = dict(self._inventory) if self._inventory is not None else None
+            return inventory, self._timestamp, self._seq
+
+    def get_tag(self, name):
+        """返回标签的 (值, 读取时间)；缓存过期或没有该标签时值为 None"""
+        with self._lock:
+            value, ts = self._tags.get(name), self._timestamp
+        if self.is_stale():
+            value = None
+        return value, ts
+
+    def age(self):
+        """缓存距今的秒数，从未读取成功时返回 None"""
+        with self._lock:
+            ts = self._timestamp
+        return time.time() - ts if ts else None
+
+    def is_stale(self):
+        age = self.age()
+        return age is None or age > self.stale_after
+
+    def get_stats(self):
+        inventory, ts, seq = self.get()
+        age = self.age()
+        return {
+            "period": self.period,
+            "reads": self.read_count,
+            "errors": self.error_count,
+            "seq": seq,
+            "age_ms": round(age * 1000, 1) if age is not None else None,
+            "stale": self.is_stale(),
+            "inventory": {str(k): v for k, v in inventory.items()} if inventory else None,
+            "tags": dict(self._tags),
+            "events": [
+                {"ts": round(t, 3), "slot": s, "old": old, "new": new}
+                for t, s, old, new in list(self.events)
+            ],
+        }
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.period * 2))
+            self._thread = None
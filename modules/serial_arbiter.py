@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/serial_arbiter.py
+
+import time
+import queue
+import itertools
+import threading
+
+# 优先级：数字越小越先执行
+PRIORITY_ESTOP = 0    # 急停 / 停止，永远插队到最前
+PRIORITY_IO = 1       # GPIO 读写 (G35/G36/G5/气爪)
+PRIORITY_MOTION = 2   # 运动指令
+PRIORITY_POLL = 3     # 角度/坐标等状态轮询
+
+COMMAND_PRIORITY = {
+    "stop": PRIORITY_ESTOP,
+    "pause": PRIORITY_ESTOP,
+    "power_off": PRIORITY_ESTOP,
+    "get_basic_input": PRIORITY_IO,
+    "set_basic_output": PRIORITY_IO,
+    "send_angles": PRIORITY_MOTION,
+    "send_angle": PRIORITY_MOTION,
+    "send_coords": PRIORITY_MOTION,
+    "power_on": PRIORITY_MOTION,
+    "get_angles": PRIORITY_POLL,
+    "get_coords": PRIORITY_POLL,
+}
+
+class _Request:
+    __slots__ = ("name", "args", "kwargs", "enqueued", "done", "result", "error", "abandoned")
+
+    def __init__(self, name, args, kwargs):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+class SerialArbiter:
+    """
+    myCobot 串口仲裁线程
+
+    由一个线程独占串口，所有线程 (主循环、搬运线程、急停监控) 的读写请求都进入优先级队列，
+    按 "急停 > GPIO > 运动 > 轮询" 的顺序逐条执行，串口上永远只有一条指令在途。
+    同时记录每种指令的排队时间与往返耗时，以及串口占用率 (执行指令的时间 / 墙钟时间)。
+    """
+
+    UTIL_WINDOW = 1.0   # 占用率统计窗口 (秒)
+
+    def __init__(self, robot, min_gap=0.0, default_timeout=3.0):
+        self.robot = robot
+        self.min_gap = min_gap                 # 两条指令之间的最小间隔 (秒)
+        self.default_timeout = default_timeout
+
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._started_at = time.perf_counter()
+        self._busy_total = 0.0
+        self._window_start = self._started_at
+        self._window_busy = 0.0
+        self._last_util = 0.0
+        self.running = True
+
+        self._thread = threading.Thread(target=self._run, name="SerialArbiter", daemon=True)
+        self._thread.start()
+
+    def call(self, name, args=(), kwargs=None, priority=None, timeout=None):
+        """
+        提交一条串口指令并等待结果
+        超时返回 None (与 pymycobot 读不到数据时的行为一致)
+        """
+        if threading.current_thread() is self._thread:
+            # 仲裁线程内部的嵌套调用直接执行，避免自己等自己
+            return getattr(self.robot, name)(*args, **(kwargs or {}))
+
+        if priority is None:
+            priority = COMMAND_PRIORITY.get(name, PRIORITY_MOTION)
+
+        req = _Request(name, args, kwargs or {})
+        self._queue.put((priority, next(self._counter), req))
+
+        if not req.done.wait(timeout if timeout is not None else self.default_timeout):
+            req.abandoned = True
+            print(f"⚠️ [Serial] 指令 {name} 等待超时 (排队中 {self._queue.qsize()} 条)")
+            return None
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _run(self):
+        last_end = 0.0
+        while self.running:
+            _, _, req = self._queue.get()
+            if req is None:
+                break
+            if req.abandoned:
+                continue
+
+            gap = self.min_gap - (time.perf_counter() - last_end)
+            if gap > 0:
+                time.sleep(gap)
+
+            start = time.perf_counter()
+            try:
+                req.result = getattr(self.robot, req.name)(*req.args, **req.kwargs)
+            except Exception as e:
+                req.error = e
+            last_end = time.perf_counter()
+
+            self._record(req.name, start - req.enqueued, last_end - start)
+            req.done.set()
+
+    def pending(self):
+        """队列中等待执行的指令数 (含已超时放弃、尚未出队的)"""
+        return self._queue.qsize()
+
+    def _record(self, name, wait, rtt):
+        with self._stats_lock:
+            st = self._stats.setdefault(name, {"count": 0, "rtt_total": 0.0, "rtt_max": 0.0, "rtt_last": 0.0, "wait_total": 0.0, "wait_max": 0.0})
+            st["count"] += 1
+            st["rtt_total"] += rtt
+            st["rtt_max"] = max(st["rtt_max"], rtt)
+            st["rtt_last"] = rtt
+            st["wait_total"] += wait
+            st["wait_max"] = max(st["wait_max"], wait)
+
+            self._busy_total += rtt
+            self._window_busy += rtt
+            now = time.perf_counter()
+            if now - self._window_start >= self.UTIL_WINDOW:
+                self._last_util = self._window_busy / (now - self._window_start)
+                self._window_start = now
+                self._window_busy = 0.0
+
+    def get_stats(self):
+        """每种指令的次数、往返耗时与排队耗时 (毫秒)，以及串口占用率 (最近一个窗口 / 启动以来)"""
+        with self._stats_lock:
+            report = {}
+            for name, st in self._stats.items():
+                n = st["count"]
+                report[name] = {
+                    "count": n,
+                    "rtt_avg_ms": round(st["rtt_total"] / n * 1000, 2),
+                    "rtt_max_ms": round(st["rtt_max"] * 1000, 2),
+                    "rtt_last_ms": round(st["rtt_last"] * 1000, 2),
+                    "wait_avg_ms": round(st["wait_total"] / n * 1000, 2),
+                    "wait_max_ms": round(st["wait_max"] * 1000, 2),
+                }
+            report["_queue_depth"] = self._queue.qsize()
+            elapsed = time.perf_counter() - self._started_at
+            report["_utilization"] = round(self._last_util, 3)
+            report["_utilization_avg"] = round(self._busy_total / elapsed, 3) if elapsed > 0 else 0.0
+            return report
+
+    def close(self):
+        self.running = False
+        self._queue.put((-1, next(self._counter), None))
+        self._thread.join(timeout=1.0)
+
+class ArbitratedRobot:
+    """
+    MyCobot280 的透明代理：self.mc.get_angles() 等调用自动经过仲裁队列，
+    ArmController 里原有的调用方式无需改动
+    """
+
+    def __init__(self, arbiter):
+        self._arbiter = arbiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._arbiter.robot, name)
+        if not callable(attr):
+            return attr
+
+        def proxy(*args, **kwargs):
+            return self._arbiter.call(name, args, kwargs)
+        proxy.__name__ = name
+        return proxy
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/sim_robot.py
+
+import time
+import math
+import random
+import threading
+
+class SimulatedMyCobot280:
+    """
+    MyCobot280 运动学仿真后端 (settings.SIMULATION_MODE = True 时由 ArmController 使用)
+
+    只实现 ArmController 用到的接口，行为尽量贴近真机：
+    - send_angles: 电机启动延迟后，所有关节同步匀速运动，耗时 = 最大位移 / (speed x 系数)；
+      运动途中收到新指令时从当前位置接续 (飞越 / 急停都能正确模拟)
+    - 到位时沿运动方向冲过目标，再指数收敛到一个随机稳态误差；get_angles 叠加读数噪声
+    - 每次调用模拟串口往返延迟，可按比例模拟读取失败 (返回 -1)
+    - GPIO 输入可以直接设置，也可以按时间脚本变化，或跟随某个输出延时变化 (模拟气爪反馈)；
+      输出写入会记录下来供测试检查
+    """
+
+    def __init__(self, port=None, baud=None, initial_angles=None,
+                 deg_per_sec_per_speed=1.6, motion_startup=0.15,
+                 latency=0.008, latency_jitter=0.004, read_fail_rate=0.0,
+                 settle_error=1.0, overshoot=2.0, settle_tau=0.08, noise=0.2,
+                 inputs=None, seed=None):
+        self.port = port
+        self.baud = baud
+        self.deg_per_sec_per_speed = deg_per_sec_per_speed
+        self.motion_startup = motion_startup
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.read_fail_rate = read_fail_rate
+        self.settle_error = settle_error    # 到位后的稳态误差上限 (度)
+        self.overshoot = overshoot          # 到位时冲过目标的最大幅度 (度)
+        self.settle_tau = settle_tau        # 超调回落的时间常数 (秒)
+        self.noise = noise                  # 角度读数噪声标准差 (度)
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._powered = False
+
+        angles = list(initial_angles) if initial_angles else [0.0] * 6
+        self._start = angles
+        self._target = list(angles)
+        self._offset = [0.0] * 6
+        self._overshoot = [0.0] * 6
+        self._t0 = time.time()
+        self._duration = 0.0
+
+        self.inputs = dict(inputs or {})
+        self.outputs = {}
+        self.output_log = []        # [(时间戳, 引脚, 电平)]
+        self._input_script = []     # [(生效时间戳, 引脚, 电平)]，按时间排序
+        self._links = {}            # {输出引脚: (输入引脚, 延迟秒, 是否反相)}
+        self.call_count = 0
+
+    # ---------- 串口延迟 ----------
+    def _io(self):
+        self.call_count += 1
+        delay = self.latency + self._rng.uniform(-self.latency_jitter, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _failed(self):
+        return self.read_fail_rate > 0 and self._rng.random() < self.read_fail_rate
+
+    # ---------- 运动学 ----------
+    def _position(self, now):
+        """理论位置 (不含读数噪声)"""
+        elapsed = now - self._t0 - self.motion_startup
+        if elapsed <= 0:
+            return list(self._start)
+        if elapsed < self._duration:
+            ratio = elapsed / self._duration
+            return [s + (t - s) * ratio for s, t in zip(self._start, self._target)]
+
+        # 到位后：先冲过目标 (在 tau 时刻达到峰值)，再指数收敛到带稳态误差的位置，位置全程连续
+        if self.settle_tau <= 0:
+            return [t + off for t, off in zip(self._target, self._offset)]
+        x = (elapsed - self._duration) / self.settle_tau
+        decay = math.exp(-x)
+        return [t + off * (1.0 - decay) + ov * x * decay
+                for t, off, ov in zip(self._target, self._offset, self._overshoot)]
+
+    def _command(self, target, speed):
+        now = time.time()
+        with self._lock:
+            start = self._position(now)
+            self._start = start
+            self._target = [float(a) for a in target]
+            self._t0 = now
+            distance = max(abs(t - s) for s, t in zip(start, self._target))
+            self._duration = distance / (max(1, speed) * self.deg_per_sec_per_speed)
+            self._offset = [self._rng.uniform(-self.settle_error, self.settle_error) for _ in range(6)]
+            # 超调方向与运动方向一致，幅度 e 倍缩放后峰值不超过 overshoot
+            self._overshoot = [math.e * self._rng.uniform(0, self.overshoot) * (1 if t >= s else -1)
+                               for s, t in zip(start, self._target)]
+
+    def send_angles(self, angles, speed):
+        self._io()
+        if not self._powered:
+            return
+        self._command(angles, speed)
+
+    def send_angle(self, joint, angle, speed):
+        self._io()
+        if not self._powered:
+            return
+        with self._lock:
+            target = list(self._target)
+        target[joint - 1] = angle
+        self._command(target, speed)
+
+    def get_angles(self):
+        self._io()
+        if self._failed():
+            return -1
+        with self._lock:
+            pos = self._position(time.time())
+        return [round(a + self._rng.gauss(0.0, self.noise), 2) for a in pos]
+
+    def is_moving(self):
+        self._io()
+        with self._lock:
+            return 1 if time.time() - self._t0 < self.motion_startup + self._duration else 0
+
+    def stop(self):
+        """急停：冻结在当前位置"""
+        self._io()
+        now = time.time()
+        with self._lock:
+            pos = self._position(now)
+            self._start = pos
+            self._target = list(pos)
+            self._offset = [0.0] * 6
+            self._overshoot = [0.0] * 6
+            self._t0 = now - self.motion_startup
+            self._duration = 0.0
+
+    pause = stop
+
+    # ---------- 电源 ----------
+    def is_power_on(self):
+        self._io()
+        return 1 if self._powered else 0
+
+    def power_on(self):
+        self._io()
+        self._powered = True
+
+    def power_off(self):
+        self._io()
+        self.stop()
+        self._powered = False
+
+    def release_all_servos(self):
+        self.power_off()
+
+    # ---------- GPIO ----------
+    def set_input(self, pin, value):
+        """立即改变输入引脚电平 (模拟 PLC / 按钮)"""
+        with self._lock:
+            self.inputs[pin] = value
+
+    def script_input(self, pin, steps):
+        """
+        按时间脚本改变输入电平，steps: [(相对现在的秒数, 电平), ...]
+        例: script_input(35, [(2.0, 0), (2.05, 1)]) 在 2 秒后制造一个 50ms 的低电平毛刺
+        """
+        now = time.time()
+        with self._lock:
+            self._input_script.extend((now + dt, pin, value) for dt, value in steps)
+            self._input_script.sort(key=lambda s: s[0])
+
+    def link_output(self, out_pin, in_pin, delay, invert=False):
+        """
+        模拟执行器反馈：输出引脚变化 delay 秒后，输入引脚跟随变化
+        例: link_output(2, 39, 0.12) 模拟气爪夹紧 120ms 后磁性开关动作
+        """
+        self._links[out_pin] = (in_pin, delay, invert)
+
+    def _apply_script(self, now):
+        while self._input_script and self._input_script[0][0] <= now:
+            _, pin, value = self._input_script.pop(0)
+            self.inputs[pin] = value
+
+    def get_basic_input(self, pin):
+        self._io()
+        if self._failed():
+            return -1
+        with self._lock:
+            self._apply_script(time.time())
+            return self.inputs.get(pin, 0)
+
+    def set_basic_output(self, pin, value):
+        self._io()
+        with self._lock:
+            self.outputs[pin] = value
+            self.output_log.append((time.time(), pin, value))
+        if pin in self._links:
+            in_pin, delay, invert = self._links[pin]
+            self.script_input(in_pin, [(delay, (1 - value) if invert else value)])
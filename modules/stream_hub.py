@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/stream_hub.py
+
+import cv2
+import threading
+import time
+
+class JpegBroadcastHub:
+    """
+    MJPEG 广播中心：每一帧只编码一次
+
+    主循环通过 publish() 推送原始画面 (附带序号)，不做任何编码。
+    第一个需要这一帧的订阅者负责编码，结果按序号缓存；
+    其余订阅者直接拿到同一个 bytes 对象，编码开销为 O(帧数) 而不是 O(帧数 x 客户端数)。
+    """
+
+    def __init__(self, quality=60, min_interval=0.05):
+        self.quality = quality
+        self.min_interval = min_interval  # 单个客户端的最短推送间隔 (秒)，即最高 20 FPS
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+
+        # 编码缓存：(序号, multipart 数据块)
+        self._encode_lock = threading.Lock()
+        self._chunk_seq = 0
+        self._chunk = None
+
+        self._subscribers = 0
+        self.encode_count = 0
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    def publish(self, frame, seq=None):
+        """推送一帧原始画面；seq 不传时自动递增"""
+        with self._cond:
+            self._frame = frame
+            self._seq = seq if seq is not None else self._seq + 1
+            self._cond.notify_all()
+
+    def get_chunk(self, last_seq, timeout=1.0):
+        """
+        等待比 last_seq 更新的一帧，返回 (seq, chunk)
+        chunk 是已经拼好 multipart 头的 JPEG 数据；超时返回 (last_seq, None)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq, timeout)
+            if self._seq <= last_seq or self._frame is None:
+                return last_seq, None
+            seq, frame = self._seq, self._frame
+
+        with self._encode_lock:
+            if self._chunk_seq != seq:
+                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if not ret:
+                    return seq, None
+                self._chunk = b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n'
+                self._chunk_seq = seq
+                self.encode_count += 1
+            return seq, self._chunk
+
+    def stream(self):
+        """单个 /video_feed 客户端的 MJPEG 生成器"""
+        with self._cond:
+            self._subscribers += 1
+        try:
+            last_seq = 0
+            while True:
+                started = time.time()
+                last_seq, chunk = self.get_chunk(last_seq)
+                if chunk is None:
+                    continue
+                yield chunk
+                time.sleep(max(0.0, self.min_interval - (time.time() - started)))
+        finally:
+            with self._cond:
+                self._subscribers -= 1
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/trigger_filter.py
+
+import time
+from collections import Counter, deque
+
+class TemporalTriggerFilter:
+    """
+    视觉触发的时间投票滤波 (N-of-M + 颜色迟滞)
+
+    - 有无判定：最近 M 帧 (window) 中至少 N 帧 (required) 检测到物体，才认定"稳定有物"；
+      低于 N 帧则认定物体离开。单帧噪声无法再直接触发抓取。
+    - 颜色迟滞：一旦锁定颜色，只有新颜色在窗口内的票数领先当前颜色 color_margin 票以上才会切换，
+      防止颜色在两种之间来回跳。
+    - 延迟统计：记录物体首次进入 ROI 到形成稳定判定所用的时间。
+    """
+
+    def __init__(self, window=5, required=3, color_margin=2, history_size=200):
+        if not 1 <= required <= window:
+            raise ValueError("必须满足 1 <= required <= window")
+        self.window = window
+        self.required = required
+        self.color_margin = color_margin
+
+        self.history = deque(maxlen=window)  # (timestamp, detected, color)
+        self.latencies = deque(maxlen=history_size)
+        self.reset()
+
+    def reset(self):
+        """清空投票窗口 (例如机械臂离开观测点、开始搬运时)"""
+        self.history.clear()
+        self.stable = False
+        self.stable_color = "unknown"
+        self.entry_time = None
+        self._decided = False
+
+    def update(self, vision_data, timestamp=None):
+        """
+        输入单帧的 process_frame 结果，返回滤波后的判定：
+        {"detected": bool, "color": str, "votes": {color: n}, "latency": 秒 或 None}
+        latency 只在本次物体首次形成稳定判定的那一帧给出，其余帧为 None
+        """
+        ts = timestamp if timestamp else time.time()
+        detected = bool(vision_data and vision_data.get("detected"))
+        color = vision_data.get("color", "unknown").lower() if detected else None
+
+        if detected and self.entry_time is None:
+            self.entry_time = ts  # 物体首次进入 ROI 的时刻
+        self.history.append((ts, detected, color))
+
+        votes = Counter(c for _, d, c in self.history if d)
+        hits = sum(votes.values())
+        latency = None
+
+        if hits >= self.required:
+            leader, leader_votes = votes.most_common(1)[0]
+            if not self.stable:
+                self.stable = True
+                self.stable_color = leader
+            elif leader != self.stable_color and leader_votes >= votes.get(self.stable_color, 0) + self.color_margin:
+                self.stable_color = leader
+
+            if not self._decided:
+                self._decided = True
+                latency = ts - self.entry_time
+                self.latencies.append(latency)
+        else:
+            self.stable = False
+            self.stable_color = "unknown"
+            if hits == 0:
+                # 窗口内完全没有物体：视为物体已离开，下一个物体重新计时
+                self.entry_time = None
+                self._decided = False
+
+        return {
+            "detected": self.stable,
+            "color": self.stable_color,
+            "votes": dict(votes),
+            "latency": latency
+        }
+
+    def get_stats(self):
+        """入区到稳定判定的延迟统计 (秒)"""
+        if not self.latencies:
+            return {"count": 0, "last": None, "mean": None, "max": None}
+        return {
+            "count": len(self.latencies),
+            "last": round(self.latencies[-1], 3),
+            "mean": round(sum(self.latencies) / len(self.latencies), 3),
+            "max": round(max(self.latencies), 3)
+        }
@@ -12,103 +12,323 @@ import cv2
 import numpy as np
 import json
 import os
+import time
+import threading
+
+from modules.color_classifier import ColorClassifier
 
 class VisionSystem:
-    def __init__(self, config_dir="config"):
+    # 默认颜色阈值 (红、黄、银)，vision_config.json 中没有 colors 段时使用
+    # 格式: 'color_name': [ (Lower_HSV, Upper_HSV), ... ]
+    DEFAULT_COLORS = {
+        'red': [
+            (np.array([0, 43, 46]), np.array([10, 255, 255])),
+            (np.array([156, 43, 46]), np.array([180, 255, 255]))
+        ],
+        'yellow': [
+            (np.array([11, 43, 46]), np.array([34, 255, 255]))
+        ],
+        'silver': [
+            (np.array([0, 0, 46]), np.array([180, 40, 255]))
+        ]
+    }
+
+    # 变化检测门限默认值，可在 vision_config.json 的 change_gate 段覆盖
+    DEFAULT_CHANGE_GATE = {
+        "enabled": True,
+        "size": 16,          # 每个通道缩略图的边长 (像素)
+        "threshold": 3.0,    # 每个通道缩略图的平均绝对差都低于此值才视为"画面没变"
+        "force_frames": 15,  # 最多连续复用多少帧就必须完整识别一次
+        "force_sec": 0.5     # 距上次完整识别超过多少秒必须完整识别一次
+    }
+
+    def __init__(self, config_dir="config", reload_interval=1.0):
         # 1. 路径处理
         self.base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
         self.config_dir = os.path.join(self.base_dir, config_dir)
+        self.config_path = os.path.join(self.config_dir, "vision_config.json")
 
-        # 2. 加载 ROI 配置文件 (这个依然需要，因为要划定检测区域)
-        vision_config_path = os.path.join(self.config_dir, "vision_config.json")
-        self.roi = None
-        if os.path.exists(vision_config_path):
-            with open(vision_config_path, 'r') as f:
-                data = json.load(f)
-                self.roi = data.get("roi") # [x, y, w, h]
-                print(f"✅ [Vision] ROI 区域已加载: {self.roi}")
+        # 2. 热更新：每隔 reload_interval 秒检查一次文件 mtime，变化后在后台重建分类器
+        self.reload_interval = reload_interval
+        self._config_stamp = None
+        self._last_check = time.time()
+        self._reloading = False
+
+        # 3. 变化检测门：画面相对上次完整识别没有变化时，直接复用上次结果
+        self.change_gate = dict(self.DEFAULT_CHANGE_GATE)
+        self.gate_stats = {"full": 0, "reused": 0}
+        self._gate_ref = None
+        self._gate_lanes = None
+        self._gate_result = None
+        self._gate_time = 0.0
+        self._gate_frames = 0
+
+        # 4. 加载 ROI 与颜色阈值，并预先构建 HSV -> 颜色 查找表
+        # (roi, colors, classifier) 作为一个整体原子替换，检测时不会拿到新旧混搭的配置
+        self._active = None
+        if os.path.exists(self.config_path):
+            try:
+                self._active = self._load_config()
+                print(f"✅ [Vision] ROI 区域已加载: {self.lanes}")
+                print(f"✅ [Vision] 颜色阈值已加载: {list(self.colors.keys())}")
+            except Exception as e:
+                print(f"❌ [Vision] vision_config.json 读取失败，使用默认颜色阈值: {e}")
         else:
             print("⚠️ [Vision] 未找到 vision_config.json，请确保已圈定 ROI 区域")
 
-        # 3. 颜色阈值 (红、黄、银)
-        # 格式: 'color_name': [ (Lower_HSV, Upper_HSV), ... ]
-        self.colors = {
-            'red': [
-                (np.array([0, 43, 46]), np.array([10, 255, 255])),
-                (np.array([156, 43, 46]), np.array([180, 255, 255]))
-            ],
-            'yellow': [
-                (np.array([11, 43, 46]), np.array([34, 255, 255]))
-            ],
-            'silver': [
-                (np.array([0, 0, 46]), np.array([180, 40, 255]))
-            ]
-        }
+        if self._active is None:
+            self._active = ([], self.DEFAULT_COLORS, ColorClassifier(self.DEFAULT_COLORS))
 
-    def process_frame(self, frame):
+    # ================= 配置加载与热更新 =================
+    @property
+    def lanes(self):
+        """检测通道列表 [(name, [x, y, w, h]), ...]"""
+        return self._active[0]
+
+    @property
+    def roi(self):
+        """主通道 (第一个通道) 的 ROI，兼容单 ROI 的旧用法"""
+        lanes = self._active[0]
+        return lanes[0][1] if lanes else None
+
+    @roi.setter
+    def roi(self, value):
+        _, colors, classifier = self._active
+        self._active = ([("main", value)] if value else [], colors, classifier)
+
+    @property
+    def colors(self):
+        return self._active[1]
+
+    @property
+    def classifier(self):
+        return self._active[2]
+
+    def _config_file_stamp(self):
+        st = os.stat(self.config_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_config(self):
+        """
+        读取 vision_config.json 并构建配置
+        无论成功与否都记下文件戳：读取失败时要等文件再次变化才重试，不会每次检查都重复报错
+        """
+        stamp = self._config_file_stamp()
+        try:
+            with open(self.config_path, 'r') as f:
+                data = json.load(f)
+            return self._build_config(data)
+        finally:
+            self._config_stamp = stamp
+
+    @staticmethod
+    def parse_colors(raw_colors):
+        """
+        把 tools/calibrate_vision.py 保存的 colors 段转换为 [(lower, upper), ...] 格式
+        支持两种写法：
+          "red": [[H, S, V], [H, S, V]]                  单个区间
+          "red": [[[H, S, V], [H, S, V]], [[...], [...]]] 多个区间
+        若 H_min > H_max，视为跨越 0 度的红色区间，自动拆成两段
+        """
+        colors = {}
+        for name, spec in raw_colors.items():
+            if len(spec) == 2 and all(isinstance(v, (int, float)) for v in spec[0]):
+                spec = [spec]
+
+            ranges = []
+            for lower, upper in spec:
+                lower = np.array(lower, dtype=int)
+                upper = np.array(upper, dtype=int)
+                if lower[0] > upper[0]:
+                    ranges.append((lower, np.array([180, upper[1], upper[2]])))
+                    ranges.append((np.array([0, lower[1], lower[2]]), upper))
+                else:
+                    ranges.append((lower, upper))
+            colors[name.lower()] = ranges
+        return colors
+
+    @staticmethod
+    def parse_lanes(data):
+        """
+        解析检测通道：
+          "lanes": [{"name": "A", "roi": [x, y, w, h]}, ...]   多通道
+          "roi": [x, y, w, h]                                  单通道 (名称为 main)
+        """
+        if data.get("lanes"):
+            return [(str(lane.get("name", f"lane{i + 1}")), [int(v) for v in lane["roi"]])
+                    for i, lane in enumerate(data["lanes"])]
+        if data.get("roi"):
+            return [("main", [int(v) for v in data["roi"]])]
+        return []
+
+    def _build_config(self, data):
+        lanes = self.parse_lanes(data)
+        colors = self.parse_colors(data["colors"]) if data.get("colors") else self.DEFAULT_COLORS
+        # "classifier": "auto" / "lut" / "inrange" / "percolor"，可用 tools/classifier_benchmark.py 实测后指定
+        classifier = ColorClassifier(colors, method=data.get("classifier", "auto"))
+        self.change_gate = dict(self.DEFAULT_CHANGE_GATE, **data.get("change_gate", {}))
+        return (lanes, colors, classifier)
+
+    def maybe_reload(self):
+        """
+        低成本检查配置文件是否变化 (只做 os.stat)，变化时在后台线程重建分类器，
+        构建完成后一次性替换，检测循环全程不停顿
+        """
+        now = time.time()
+        if self._reloading or now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+
+        try:
+            stamp = self._config_file_stamp()
+        except OSError:
+            return
+        if stamp == self._config_stamp:
+            return
+
+        self._reloading = True
+        threading.Thread(target=self._reload_worker, name="VisionReload", daemon=True).start()
+
+    def _reload_worker(self):
+        try:
+            self._active = self._load_config()
+            print(f"🔄 [Vision] 检测到 vision_config.json 更新，已热加载 ROI {self.lanes} 与颜色 {list(self.colors.keys())}")
+        except Exception as e:
+            # 保持旧配置；文件写完 / 修正后文件戳会再次变化，届时自动重试
+            print(f"⚠️ [Vision] 热加载 vision_config.json 失败，继续使用旧配置: {e}")
+        finally:
+            self._reloading = False
+
+    def detect(self, frame):
         """
-        处理流程：绘制ROI -> 裁切 -> 颜色分析
+        纯检测：裁切 ROI -> 颜色分析，不在画面上绘制任何内容
+        只读取 frame，可以安全地在共享内存 / 其他进程中调用
+
+        多通道时所有通道合并成一个外接矩形，只做一次 HSV 转换 / 模糊 / 颜色分类，
+        再由 ColorClassifier.count_regions 按各通道区域分别计数；结果按通道放在 result["lanes"] 中，
+        顶层字段保持为第一个通道的结果，兼容旧的单 ROI 调用方。
         """
 
         # 初始化结果容器
         result = {
             "detected": False,
             "color": "unknown",
-            "offset": (0, 0) # 偏移量已弃用，保留结构以防上层报错
+            "offset": (0, 0), # 偏移量已弃用，保留结构以防上层报错
+            "lanes": {},
+            "cached": False   # True 表示画面无变化，复用了上一次的完整识别结果
         }
 
+        self.maybe_reload()
+        # 取一次当前配置快照，热加载在两帧之间整体替换
+        lanes, _, classifier = self._active
+
         # 1. 如果没有 ROI，直接返回
-        if not self.roi:
+        if not lanes:
+            return result
+
+        # 2. 所有通道的外接矩形
+        ux0 = min(x for _, (x, y, w, h) in lanes)
+        uy0 = min(y for _, (x, y, w, h) in lanes)
+        ux1 = max(x + w for _, (x, y, w, h) in lanes)
+        uy1 = max(y + h for _, (x, y, w, h) in lanes)
+        union_img = frame[uy0:uy1, ux0:ux1]
+
+        # 3. 变化检测门：每个通道各自做缩略图，和上次完整识别时比较，全部没变化才跳过整套颜色分析
+        # (不能用外接矩形的整体缩略图：小物体只进入其中一个通道时，整体平均差几乎不变)
+        signature = None
+        if self.change_gate.get("enabled"):
+            size = int(self.change_gate.get("size", 16))
+            signature = [cv2.resize(frame[y:y + h, x:x + w], (size, size), interpolation=cv2.INTER_AREA)
+                         for _, (x, y, w, h) in lanes]
+            if self._can_reuse(signature, lanes):
+                self._gate_frames += 1
+                self.gate_stats["reused"] += 1
+                return dict(self._gate_result, cached=True)
+
+        # 4. 核心逻辑：整块只转换一次 HSV，只分类一次
+        hsv_union = cv2.cvtColor(union_img, cv2.COLOR_BGR2HSV)
+        hsv_union = cv2.GaussianBlur(hsv_union, (5, 5), 0)
+        lane_counts = classifier.count_regions(hsv_union, [(x - ux0, y - uy0, w, h) for _, (x, y, w, h) in lanes])
+
+        # 5. 按通道统计
+        for (name, (x, y, w, h)), counts in zip(lanes, lane_counts):
+
+            # 阈值：颜色像素必须占 ROI 面积的 5% 以上
+            pixel_threshold = w * h * 0.05
+            detected_color = classifier.best_color(counts, pixel_threshold)
+
+            result["lanes"][name] = {
+                "detected": detected_color is not None,
+                "color": detected_color or "unknown",
+                "counts": classifier.counts_to_dict(counts)
+            }
+
+        # 6. 顶层结果 = 主通道
+        primary = result["lanes"][lanes[0][0]]
+        result["detected"] = primary["detected"]
+        result["color"] = primary["color"]
+        result["counts"] = primary["counts"]
+
+        # 7. 记录本次完整识别，作为后续帧的比较基准
+        self.gate_stats["full"] += 1
+        self._gate_ref = signature
+        self._gate_lanes = lanes
+        self._gate_result = result
+        self._gate_time = time.time()
+        self._gate_frames = 0
+
+        return result
+
+    def _can_reuse(self, signature, lanes):
+        """
+        判断能否复用上次的完整识别结果：
+        基准存在、通道配置没变、没到强制刷新的帧数/时间，且每个通道的缩略图平均差异都低于门限
+        (物体进入任一通道都会让该通道的缩略图明显变化，从而立即触发完整识别)
+        """
+        gate = self.change_gate
+        if self._gate_ref is None or lanes is not self._gate_lanes:
+            return False
+        if self._gate_frames >= gate.get("force_frames", 15):
+            return False
+        if time.time() - self._gate_time >= gate.get("force_sec", 0.5):
+            return False
+        threshold = gate.get("threshold", 3.0)
+        return all(cv2.norm(sig, ref, cv2.NORM_L1) / sig.size < threshold
+                   for sig, ref in zip(signature, self._gate_ref))
+
+    def draw_overlay(self, frame, result):
+        """
+        在画面上绘制各通道 ROI 框、识别结果与中心点 (直接修改并返回 frame)
+        result 为 None 时只绘制 ROI 框
+        """
+        lanes = self.lanes
+        if not lanes:
             cv2.putText(frame, "NO ROI CONFIG", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            return frame, result
-
-        # 2. 绘制 ROI 框 (绿色矩形)
-        x, y, w, h = self.roi
-        cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-        cv2.putText(frame, "Detection Zone", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-        # 3. 核心逻辑：裁切 + 颜色分析
-        roi_img = frame[y:y+h, x:x+w]
-        
-        # 转换到 HSV 空间
-        hsv_roi = cv2.cvtColor(roi_img, cv2.COLOR_BGR2HSV)
-        hsv_roi = cv2.GaussianBlur(hsv_roi, (5, 5), 0)
-
-        detected_color = None
-        max_pixels = 0
-        total_pixels = w * h
-        
-        # 阈值：颜色像素必须占 ROI 面积的 5% 以上
-        pixel_threshold = total_pixels * 0.05 
-
-        # 遍历颜色库
-        for color_name, ranges in self.colors.items():
-            mask = np.zeros(hsv_roi.shape[:2], dtype="uint8")
-            
-            for (lower, upper) in ranges:
-                mask += cv2.inRange(hsv_roi, lower, upper)
-
-            mask = cv2.erode(mask, None, iterations=2)
-            mask = cv2.dilate(mask, None, iterations=2)
-
-            count = cv2.countNonZero(mask)
-            
-            if count > pixel_threshold and count > max_pixels:
-                max_pixels = count
-                detected_color = color_name
-
-        # 4. 更新结果
-        if detected_color:
-            result["detected"] = True
-            result["color"] = detected_color
-            
-            # 在画面上显示结果
-            text = f"Color: {detected_color.upper()}"
-            (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-            cv2.rectangle(frame, (x, y + h + 5), (x + text_w, y + h + 30), (0, 0, 0), -1)
-            cv2.putText(frame, text, (x, y + h + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-            
-            # 画一个实心圆点表示识别中心
-            cv2.circle(frame, (x + w//2, y + h//2), 8, (0, 255, 0), -1)
-
-        return frame, result
\ No newline at end of file
+            return frame
+
+        lane_results = result.get("lanes", {}) if result else {}
+        for name, (x, y, w, h) in lanes:
+            # 绘制 ROI 框 (绿色矩形)
+            title = "Detection Zone" if len(lanes) == 1 else f"Lane {name}"
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+            cv2.putText(frame, title, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+            lane = lane_results.get(name)
+            if lane and lane.get("detected"):
+                # 在画面上显示结果
+                text = f"Color: {lane['color'].upper()}"
+                (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+                cv2.rectangle(frame, (x, y + h + 5), (x + text_w, y + h + 30), (0, 0, 0), -1)
+                cv2.putText(frame, text, (x, y + h + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                
+                # 画一个实心圆点表示识别中心
+                cv2.circle(frame, (x + w//2, y + h//2), 8, (0, 255, 0), -1)
+
+        return frame
+
+    def process_frame(self, frame):
+        """
+        处理流程：裁切 -> 颜色分析 -> 绘制ROI与结果
+        """
+        result = self.detect(frame)
+        return self.draw_overlay(frame, result), result
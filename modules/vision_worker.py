@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Hangzhou Zhicheng Technology Co., Ltd. All rights reserved.
+#
+# This code is proprietary and confidential.
+# Unauthorized copying of this file, via any medium is strictly prohibited.
+#
+# System: Coffee Intelligent Sorting System
+# Author: Hangzhou Zhicheng Technology Co., Ltd
+# modules/vision_worker.py
+
+import time
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+class SharedFrameRing:
+    """
+    基于 multiprocessing.shared_memory 的画面环形缓冲区
+
+    内存布局: seqs[int64 x slots] | stamps[float64 x slots] | frames[uint8 x slots x H x W x C]
+    写入时先把该槽位的 seq 置为 -1，写完画面后再写入真实 seq (简易 seqlock)；
+    读取方在处理前后各核对一次 seq，不一致说明画面被覆盖，直接丢弃结果。
+    """
+
+    def __init__(self, shape, slots=4, name=None, create=True):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        size = slots * (8 + 8 + frame_bytes)
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self.shm.name
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.stamps = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=8 * slots)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=16 * slots)
+        if create:
+            self.seqs[:] = -1
+
+    def write(self, slot, frame, seq, timestamp):
+        self.seqs[slot] = -1
+        self.frames[slot][...] = frame
+        self.stamps[slot] = timestamp
+        self.seqs[slot] = seq
+
+    def is_valid(self, slot, seq):
+        return int(self.seqs[slot]) == seq
+
+    def close(self):
+        # 先释放 numpy 视图，否则 SharedMemory.close() 会因为仍有引用而报错
+        self.seqs = self.stamps = self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+def _vision_worker_main(shm_name, shape, slots, config_dir, task_queue, result_queue):
+    """视觉子进程入口 (必须是模块级函数，Windows 的 spawn 模式才能导入)"""
+    from modules.vision import VisionSystem
+
+    ring = SharedFrameRing(shape, slots, name=shm_name, create=False)
+    vision = VisionSystem(config_dir)
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            slot, seq, timestamp = task
+
+            if not ring.is_valid(slot, seq):
+                result_queue.put((seq, timestamp, None, 0.0))
+                continue
+
+            # 直接在共享内存上做纯检测 (只读 ROI，不复制整帧、不绘图)
+            t0 = time.perf_counter()
+            result = vision.detect(ring.frames[slot])
+            cost = time.perf_counter() - t0
+
+            # 处理期间画面被覆盖，结果不可信
+            if not ring.is_valid(slot, seq):
+                result = None
+            result_queue.put((seq, timestamp, result, cost))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+class VisionWorkerPool:
+    """
+    进程外视觉处理池
+
+    控制进程只负责把画面拷进共享内存环形缓冲区并投递 (槽位, 序号, 时间戳)，
+    一个或多个子进程完成颜色分类后只回传很小的结果字典。
+    视觉计算不再与串口轮询 / 控制循环争抢 GIL 和 CPU 核心。
+
+    poll() 每次检查子进程是否存活：有子进程退出时连同任务 / 结果队列整体重建
+    (被杀死的进程可能正持有队列的读锁，旧队列已不可用)，在途记录一并清空；
+    超过 task_timeout 仍未回传的任务按丢帧处理，在途数不会因为丢失的任务永久占满。
+    重启超过 max_restarts 次，或连续 slots 个任务都超时，置 failed = True，
+    调用方应退回主进程内 VisionSystem.detect。
+    """
+
+    def __init__(self, workers=1, slots=None, config_dir="config", task_timeout=2.0, max_restarts=3):
+        self.workers = max(1, workers)
+        # 槽位数至少比最大在途任务数多 1，保证写入的槽位没有被子进程占用
+        self.slots = slots if slots else self.workers * 2 + 1
+        self.config_dir = config_dir
+        self.task_timeout = task_timeout
+        self.max_restarts = max_restarts
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ring = None
+        self._procs = []
+        self._task_queue = None
+        self._result_queue = None
+
+        self._submit_count = 0
+        self._inflight = {}         # {seq: 投递时间}
+        self._expired_streak = 0
+        self.dropped = 0
+        self.restarts = 0
+        self.failed = False
+        self.last_cost = 0.0
+
+    def _start(self, shape):
+        self._ring = SharedFrameRing(shape, self.slots)
+        self._spawn_all()
+        print(f"✅ [Vision] 已启动 {self.workers} 个视觉子进程 (共享内存 {self.slots} 槽位, 画面 {shape})")
+
+    def _spawn_all(self):
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._procs = [self._spawn(i) for i in range(self.workers)]
+
+    def _spawn(self, i):
+        p = self._ctx.Process(
+            target=_vision_worker_main,
+            args=(self._ring.name, self._ring.shape, self.slots, self.config_dir, self._task_queue, self._result_queue),
+            name=f"VisionWorker-{i}",
+            daemon=True
+        )
+        p.start()
+        return p
+
+    def _stop_workers(self):
+        for p in self._procs:
+            if p.is_alive():
+                p.terminate()
+            p.join(timeout=1.0)
+            # 被挂起 / 卡在系统调用里的进程收不到 SIGTERM，只能强杀
+            if p.is_alive():
+                p.kill()
+                p.join(timeout=1.0)
+        self._procs = []
+
+    def _check_workers(self):
+        """有子进程退出时整体重启；重启次数用尽时置 failed"""
+        dead = [p for p in self._procs if not p.is_alive()]
+        if not dead:
+            return
+        names = ", ".join(f"{p.name} (exitcode={p.exitcode})" for p in dead)
+
+        # 不知道退出的子进程拿走了哪些帧，队列里剩下的任务也随旧队列作废：全部按丢帧处理
+        self.dropped += len(self._inflight)
+        self._inflight.clear()
+        self._expired_streak = 0
+        self._stop_workers()
+
+        if self.restarts >= self.max_restarts:
+            print(f"❌ [Vision] 视觉子进程退出: {names}，重启次数已用尽，退回主进程内处理")
+            self.failed = True
+            return
+        self.restarts += 1
+        print(f"⚠️ [Vision] 视觉子进程退出: {names}，正在重启 ({self.restarts}/{self.max_restarts})")
+        self._spawn_all()
+
+    def submit(self, frame, seq, timestamp):
+        """
+        非阻塞投递一帧；子进程全忙时直接丢弃这一帧 (只关心最新画面)
+        返回是否成功投递；failed 之后一律返回 False
+        """
+        if self.failed:
+            return False
+        if self._ring is None:
+            self._start(frame.shape)
+        elif frame.shape != self._ring.shape:
+            self.dropped += 1
+            return False
+
+        if len(self._inflight) >= self.slots - 1:
+            self.dropped += 1
+            return False
+
+        slot = self._submit_count % self.slots
+        self._submit_count += 1
+        self._ring.write(slot, frame, seq, timestamp)
+        self._task_queue.put((slot, seq, timestamp))
+        self._inflight[seq] = time.time()
+        return True
+
+    def poll(self):
+        """非阻塞取回所有已完成的结果，按序号排序返回 [(seq, timestamp, result), ...]"""
+        results = []
+        if self._ring is None or self.failed:
+            return results
+
+        while True:
+            try:
+                seq, timestamp, result, cost = self._result_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._inflight.pop(seq, None)
+            self._expired_streak = 0
+            if result is None:
+                self.dropped += 1
+                continue
+            self.last_cost = cost
+            results.append((seq, timestamp, result))
+
+        self._check_workers()
+
+        # 子进程还活着但迟迟没有回传 (任务丢失 / 卡死)：按丢帧处理，释放在途名额
+        now = time.time()
+        expired = [seq for seq, t in self._inflight.items() if now - t > self.task_timeout]
+        for seq in expired:
+            del self._inflight[seq]
+        self.dropped += len(expired)
+        self._expired_streak += len(expired)
+        if not self.failed and self._expired_streak >= self.slots:
+            print(f"❌ [Vision] 连续 {self._expired_streak} 帧超过 {self.task_timeout}s 未回传结果，退回主进程内处理")
+            self.failed = True
+            # 卡死的子进程不会自己退出，不停掉会一直占着 CPU；共享内存留到 close() 时统一释放
+            self._stop_workers()
+            self._inflight.clear()
+
+        results.sort(key=lambda r: r[0])
+        return results
+
+    def close(self):
+        if self._ring is None:
+            return
+        for _ in self._procs:
+            self._task_queue.put(None)
+        for p in self._procs:
+            p.join(timeout=2.0)
+        self._stop_workers()
+        self._ring.close()
+        self._ring.unlink()
+        self._ring = None
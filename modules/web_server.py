@@ -10,12 +10,13 @@
 
 import os
 from flask import Flask, render_template, Response, request, jsonify, stream_with_context
-import cv2
 import threading
 import json
 import time
 import datetime # 🔥 新增：用于时间戳
 
+from modules.stream_hub import JpegBroadcastHub
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(current_dir)
 template_dir = os.path.join(root_dir, 'web', 'templates')
@@ -29,7 +30,11 @@ app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
 
 system_state = None
 ai_module = None
-camera_frame = None
+arm_module = None
+plc_poller = None
+
+# 视频广播中心：每帧只编码一次，所有浏览器标签页共享同一份 JPEG
+stream_hub = JpegBroadcastHub(quality=60)
 
 # ==========================================
 # 📝 聊天记录管理 (新增功能)
@@ -70,13 +75,7 @@ def save_chat_entry(sender, message, type):
 # 📹 视频流逻辑
 # ==========================================
 def get_frame():
-    global camera_frame
-    while True:
-        if camera_frame is not None:
-            ret, buffer = cv2.imencode('.jpg', camera_frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-        time.sleep(0.05)
+    return stream_hub.stream()
 
 @app.route('/')
 def index():
@@ -221,21 +220,55 @@ def status():
     if msg:
         system_state.system_msg = None 
 
+    # 库存来自 PLC 后台轮询缓存，同时返回缓存的新鲜度，过期时前端可提示库存不可信
+    plc_age = plc_poller.age() if plc_poller else None
     return jsonify({
         "inventory": system_state.inventory,
         "mode": system_state.mode,
-        "system_msg": msg
+        "system_msg": msg,
+        "plc_age_ms": round(plc_age * 1000, 1) if plc_age is not None else None,
+        "plc_stale": plc_poller.is_stale() if plc_poller else True,
+        "plc_health": plc_poller.plc.health() if plc_poller else "down"
     })
 
-def start_flask(state_obj, ai_obj):
-    global system_state, ai_module
+@app.route('/api/serial_stats')
+def serial_stats():
+    """机械臂串口每种指令的往返耗时 / 排队耗时"""
+    if not arm_module: return jsonify({})
+    return jsonify(arm_module.get_serial_stats())
+
+@app.route('/api/input_stats')
+def input_stats():
+    """GPIO 输入快照的采样统计与各引脚数据新鲜度"""
+    if not arm_module: return jsonify({})
+    return jsonify(arm_module.get_input_stats())
+
+@app.route('/api/cycle_metrics')
+def cycle_metrics():
+    """每个槽位、每个搬运阶段的耗时分布 (p50 / p95 / max，毫秒)"""
+    if not arm_module: return jsonify({})
+    return jsonify(arm_module.metrics.report())
+
+@app.route('/api/plc_stats')
+def plc_stats():
+    """PLC 库存轮询统计、缓存新鲜度、最近的槽位变化事件，以及连接状态与连接 / 读 / 写耗时"""
+    if not plc_poller: return jsonify({})
+    return jsonify(dict(plc_poller.get_stats(), client=plc_poller.plc.get_stats()))
+
+def start_flask(state_obj, ai_obj, arm_obj=None, plc_obj=None):
+    global system_state, ai_module, arm_module, plc_poller
     system_state = state_obj
     ai_module = ai_obj
+    arm_module = arm_obj
+    plc_poller = plc_obj
     import logging
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)
     app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
 
-def update_frame(frame):
-    global camera_frame
-    camera_frame = frame
\ No newline at end of file
+def has_viewers():
+    """当前是否有浏览器正在观看 /video_feed"""
+    return stream_hub.subscribers > 0
+
+def update_frame(frame, seq=None):
+    stream_hub.publish(frame, seq)
\ No newline at end of file
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# tools/calibrate_gripper.py
+# 气爪动作时间标定工具：找出夹紧 / 松开后最短的可靠等待时间，生成 GRIPPER_TIMING 配置。
+#
+# 两种模式：
+#   1. 反馈模式 (接了气爪到位反馈引脚)：机械臂不动，反复开合气爪，
+#      实测 "下发指令 -> 反馈引脚跳变" 的延迟，按最大值 + 余量给出等待时间。
+#      气缸动作延迟与点位无关，结果写入 "default"。
+#   2. 人工确认模式 (没有反馈引脚)：在抓取点放一个盒子，从长到短依次尝试候选等待时间，
+#      夹紧在 grab 点标定、松开在所选槽位的 low 点标定 (按点位写入 GRIPPER_TIMING)，
+#      运动路线与 pick / place 相同 (经 mid 防撞途经点)，由操作员确认是否可靠，取全部通过的最短时间。
+#
+# 用法示例:
+#   python tools/calibrate_gripper.py --feedback-pin 39 --trials 30
+#   python tools/calibrate_gripper.py --manual --slots 1 4 --dwells 0.5 0.4 0.3 0.25 0.2 0.15
+#   python tools/calibrate_gripper.py --sim --feedback-pin 39          # 在仿真机械臂上演练
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from config import settings
+from modules.motion_planner import OBSERVE, PICK_MID, slot_node
+
+def measure_latency(arm, pin, level, timeout):
+    """轮询反馈引脚直到读到 level，返回耗时 (秒)；超时返回 None"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if arm.mc.get_basic_input(pin) == level:
+            return time.perf_counter() - start
+    return None
+
+def run_feedback(arm, pin, trials, margin):
+    closed = arm.gripper_closed_level
+    results = {"close": [], "open": []}
+    failures = {"close": 0, "open": 0}
+
+    # 直接轮询引脚，停掉后台快照采样，避免与测量抢串口
+    if arm.inputs:
+        arm.inputs.stop()
+
+    print(f"👉 反馈模式：气爪将开合 {trials} 次，请确认气爪附近无人、无遮挡。按 Ctrl+C 终止。")
+    print("-" * 50)
+    arm.gripper_open()
+    time.sleep(1.0)
+
+    for i in range(trials):
+        for action, level in (("close", closed), ("open", 1 - closed)):
+            t0 = time.perf_counter()
+            if action == "close":
+                arm.gripper_close()
+            else:
+                arm.gripper_open()
+            latency = measure_latency(arm, pin, level, 2.0)
+            if latency is None:
+                failures[action] += 1
+                print(f"\n⚠️ 第 {i + 1} 次 {action}: 2 秒内未收到反馈")
+            else:
+                # 计入下发指令本身的串口耗时
+                results[action].append(time.perf_counter() - t0)
+            # 两次动作之间留足时间，让气缸完全到位
+            time.sleep(0.5)
+
+        sys.stdout.write(f"\r[{i + 1}/{trials}] close {results['close'][-1] * 1000 if results['close'] else 0:.0f} ms | "
+                         f"open {results['open'][-1] * 1000 if results['open'] else 0:.0f} ms      ")
+        sys.stdout.flush()
+
+    print("\n")
+    timing = {}
+    for action, values in results.items():
+        if not values:
+            print(f"❌ {action}: 没有任何有效测量，请检查反馈引脚 G{pin} 接线")
+            continue
+        v = np.array(values)
+        print(f"📊 {action:<5} 次数 {len(v)} (超时 {failures[action]}) | "
+              f"p50 {np.percentile(v, 50) * 1000:.0f} ms | p99 {np.percentile(v, 99) * 1000:.0f} ms | max {v.max() * 1000:.0f} ms")
+        # 最大值 + 余量，向上取整到 10ms
+        timing[action] = float(np.ceil((v.max() + margin) * 100) / 100)
+    return timing
+
+def ask(prompt):
+    res = input(f"👉 {prompt} [y/n，输入 q 退出]: ").strip().lower()
+    if res == 'q':
+        raise KeyboardInterrupt
+    return res == 'y'
+
+def approach_grab(arm):
+    """与 pick() 相同的安全路线：先飞到 mid 防撞途经点，再精准下探到 grab"""
+    p = settings.PICK_POSES
+    if p.get("mid"):
+        arm.travel_to(PICK_MID)
+    arm.move_to_angles_smart(p["grab"], label="grab", precise=True)
+
+def lift_from_grab(arm):
+    p = settings.PICK_POSES
+    if p.get("mid"):
+        arm.move_to_angles_smart(p["mid"], fly_by=True, label=PICK_MID)
+        arm._at_node = PICK_MID
+    else:
+        arm.move_to_angles_smart(p["observe"], fly_by=True, label=OBSERVE)
+        arm._at_node = OBSERVE
+
+def descend_slot(arm, slot_id):
+    """与 place() 相同的安全路线：沿路网飞到槽位 high，经 mid 精准下探到 low"""
+    r = settings.STORAGE_RACKS[slot_id]
+    arm.travel_to(slot_node(slot_id))
+    if r.get("mid"):
+        arm.move_to_angles_smart(r["mid"], fly_by=True, label=f"slot{slot_id}_mid")
+    arm.move_to_angles_smart(r["low"], label=f"slot{slot_id}_low", precise=True)
+
+def lift_from_slot(arm, slot_id):
+    r = settings.STORAGE_RACKS[slot_id]
+    if r.get("mid"):
+        arm.move_to_angles_smart(r["mid"], fly_by=True, label=f"slot{slot_id}_mid")
+    arm.move_to_angles_smart(r["high"], fly_by=True, label=slot_node(slot_id))
+    arm._at_node = slot_node(slot_id)
+
+def shortest_reliable(action, pose, dwells, trials, trial):
+    """从长到短尝试候选时间，trial(dwell, i) 返回是否可靠；返回全部通过的最短时间，没有则 None"""
+    best = None
+    print("\n" + "=" * 50)
+    print(f"🎯 标定 {pose} 的 {action}: 候选等待时间 {dwells} 秒，每个候选 {trials} 次")
+    print("=" * 50)
+    for dwell in sorted(dwells, reverse=True):
+        if not all(trial(dwell, i) for i in range(trials)):
+            print(f"❌ {dwell:.2f}s 不可靠，停止缩短")
+            break
+        best = dwell
+        print(f"✅ {dwell:.2f}s 全部通过")
+    if best is None:
+        print(f"⚠️ {pose} {action}: 所有候选时间都不可靠，请增大候选值后重试")
+    return best
+
+def run_manual(arm, dwells, trials, slots):
+    """
+    close 在 grab 点标定，open 在各槽位 low 点标定，返回按点位分的 {pose: {action: 秒}}
+    所有运动都走与 pick / place 相同的路线 (mid / 路网途经点)，不会从观测点直接斜插到低位
+    """
+    timing = {}
+
+    print("👉 人工确认模式：请在【抓取区】放好一个盒子。")
+    input("   放好后按回车开始...")
+    arm.gripper_open()
+    arm.go_observe()
+
+    def trial_close(dwell, i):
+        approach_grab(arm)
+        arm.gripper_close()
+        time.sleep(dwell)
+        lift_from_grab(arm)
+        ok = ask(f"[grab {dwell:.2f}s 第 {i + 1} 次] 盒子是否被稳稳夹起?")
+        # 放回盒子，恢复初始状态
+        arm.move_to_angles_smart(settings.PICK_POSES["grab"], label="grab", precise=True)
+        arm.gripper_open()
+        time.sleep(1.0)
+        lift_from_grab(arm)
+        return ok
+
+    best = shortest_reliable("close", "grab", dwells, trials, trial_close)
+    if best is not None:
+        timing["grab"] = {"close": best}
+
+    for slot_id in slots:
+        pose = f"slot{slot_id}_low"
+        print(f"\n👉 接下来在 {slot_id} 号槽位标定松开时间，请确认该槽位为空。")
+        input("   确认后按回车...")
+
+        def trial_open(dwell, i):
+            # 先按充裕时间夹稳，沿 place 的路线送到槽位 low 点，再用候选时间松开
+            approach_grab(arm)
+            arm.gripper_close()
+            time.sleep(1.0)
+            lift_from_grab(arm)
+            descend_slot(arm, slot_id)
+            arm.gripper_open()
+            time.sleep(dwell)
+            lift_from_slot(arm, slot_id)
+            ok = ask(f"[{pose} {dwell:.2f}s 第 {i + 1} 次] 盒子是否已完全脱离气爪、留在槽位中?")
+            arm.gripper_open()
+            arm.go_observe()
+            input("   请把盒子从槽位取出、放回【抓取区】后按回车...")
+            return ok
+
+        best = shortest_reliable("open", pose, dwells, trials, trial_open)
+        if best is not None:
+            timing[pose] = {"open": best}
+
+    arm.go_observe()
+    return timing
+
+def main():
+    parser = argparse.ArgumentParser(description="气爪动作时间标定")
+    parser.add_argument("--feedback-pin", type=int, default=getattr(settings, 'GRIPPER_FEEDBACK_PIN', None), help="气爪到位反馈输入引脚")
+    parser.add_argument("--manual", action="store_true", help="人工确认模式 (无反馈引脚时使用)")
+    parser.add_argument("--trials", type=int, default=20, help="每个候选 / 每种动作的重复次数")
+    parser.add_argument("--margin", type=float, default=0.03, help="反馈模式下在实测最大延迟上追加的余量 (秒)")
+    parser.add_argument("--slots", type=int, nargs="+", default=[1], help="人工确认模式下标定松开时间的槽位")
+    parser.add_argument("--dwells", type=float, nargs="+", default=[0.5, 0.4, 0.3, 0.25, 0.2, 0.15, 0.1], help="人工确认模式的候选等待时间")
+    parser.add_argument("--sim", action="store_true", help="使用仿真机械臂 (SIMULATION_MODE)")
+    args = parser.parse_args()
+
+    if args.feedback_pin is None and not args.manual:
+        print("❌ 未配置反馈引脚：请用 --feedback-pin 指定，或使用 --manual 人工确认模式")
+        return
+
+    if args.manual and any(slot_id not in settings.STORAGE_RACKS for slot_id in args.slots):
+        print(f"❌ --slots 中有未在 STORAGE_RACKS 配置的槽位: {args.slots}")
+        return
+
+    if args.sim:
+        settings.SIMULATION_MODE = True
+    if args.feedback_pin is not None:
+        settings.GRIPPER_FEEDBACK_PIN = args.feedback_pin
+
+    print("=" * 50)
+    print("🛠️ 气爪动作时间标定工具")
+    print("=" * 50)
+
+    from modules.arm_control import ArmController
+    arm = ArmController()
+    if not arm.is_connected:
+        print("❌ 机械臂连接失败，请检查连线或端口配置！")
+        return
+
+    timing = {}
+    try:
+        if args.manual:
+            timing = run_manual(arm, args.dwells, max(1, min(args.trials, 5)), args.slots)
+        else:
+            timing = {"default": run_feedback(arm, args.feedback_pin, args.trials, args.margin)}
+    except KeyboardInterrupt:
+        print("\n\n⏹️ 标定已终止。")
+    finally:
+        arm.gripper_open()
+
+    timing = {pose: t for pose, t in timing.items() if t}
+    if not timing:
+        return
+
+    # 与现有配置合并：本次没有标定的点位 / 动作保持原值
+    merged = {pose: dict(t) for pose, t in arm.gripper_timing.items()}
+    for pose, t in timing.items():
+        merged.setdefault(pose, {}).update(t)
+    print("\n" + "=" * 60)
+    print("✨ 请直接将以下代码复制并替换 config/settings.py 中的 GRIPPER_TIMING ✨")
+    print("=" * 60 + "\n")
+    print("GRIPPER_TIMING = {")
+    for pose, t in merged.items():
+        fields = ", ".join(f'"{action}": {value}' for action, value in t.items())
+        print(f'    "{pose}": {{{fields}}},')
+    print("}")
+    if not args.manual:
+        print("\n# 反馈模式下运行时以反馈信号结束等待，以上时间仅作为反馈超时后的兜底")
+    print("\n" + "=" * 60)
+
+if __name__ == "__main__":
+    main()
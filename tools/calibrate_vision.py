@@ -90,10 +90,23 @@ def save_config():
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     config_path = os.path.join(base_dir, 'config', 'vision_config.json')
 
-    data = {
-        "roi": current_roi if current_roi else [0, 0, 640, 480],
-        "colors": {}
-    }
+    # 本工具只标定主 ROI 与颜色，其余字段 (lanes / change_gate / classifier ...) 从旧文件原样保留
+    data = {}
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取旧配置失败 ({e})，只写入本次标定的 ROI 与颜色")
+            data = {}
+    kept = [k for k in data if k not in ("roi", "colors")]
+    if kept:
+        print(f"ℹ️ 已原样保留旧配置中的字段: {kept}")
+    if data.get("lanes"):
+        print("⚠️ 检测到多通道 lanes 配置，主程序将以 lanes 为准")
+
+    data["roi"] = current_roi if current_roi else [0, 0, 640, 480]
+    data["colors"] = {}
 
     for color, vals in color_configs.items():
         # 兼容旧逻辑：把 min/max 拆开
@@ -101,9 +114,12 @@ def save_config():
         upper = [int(vals[3]), int(vals[4]), int(vals[5])]
         data["colors"][color] = [lower, upper]
 
-    with open(config_path, 'w') as f:
+    # 先写临时文件再整体替换，运行中的主程序热加载时不会读到写了一半的文件
+    tmp_path = config_path + ".tmp"
+    with open(tmp_path, 'w') as f:
         json.dump(data, f, indent=4)
-    print(f"💾 配置已保存至: {config_path}")
+    os.replace(tmp_path, config_path)
+    print(f"💾 配置已保存至: {config_path} (运行中的主程序会自动热加载)")
     print(f"   已保存颜色: {list(data['colors'].keys())}")
 
 def main():
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# tools/check_change_gate.py
+# 视觉变化检测门自检 (无需摄像头)：两个检测通道，小物体只进入其中一个通道时，
+# 变化门必须放行完整识别，不能复用上一帧 "无物体" 的结果。
+# 全部检查通过返回 0，否则返回 1，可用于改动 modules/vision.py 后的回归检查。
+#
+# 用法示例:
+#   python tools/check_change_gate.py
+#   python tools/check_change_gate.py --patch 0.25        # 色块边长占通道边长的比例 (面积约为其平方)
+
+import sys
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from modules.vision import VisionSystem
+
+LANE_A = [40, 40, 200, 150]
+LANE_B = [300, 40, 200, 150]
+
+def make_vision():
+    config_dir = tempfile.mkdtemp(prefix="vision_gate_")
+    with open(os.path.join(config_dir, "vision_config.json"), "w") as f:
+        json.dump({
+            "lanes": [{"name": "A", "roi": LANE_A}, {"name": "B", "roi": LANE_B}],
+            "colors": {"red": [[0, 100, 100], [10, 255, 255]]},
+        }, f)
+    # 绝对路径会覆盖 VisionSystem 内部拼接的项目根目录
+    return VisionSystem(config_dir=config_dir, reload_interval=3600), config_dir
+
+def empty_frame():
+    # 深色传送带背景
+    return np.full((480, 640, 3), 40, dtype=np.uint8)
+
+def run_checks(vision, patch):
+    """依次检查：空画面完整识别 -> 画面不变时复用 -> 单通道出现物体时放行完整识别"""
+    checks = []
+
+    first = vision.detect(empty_frame())
+    checks.append(("首帧完整识别且通道 A 无物体", not first["cached"] and not first["lanes"]["A"]["detected"]))
+    checks.append(("画面不变时复用上次结果", vision.detect(empty_frame())["cached"]))
+
+    # 默认暗红色块约占通道 A 面积的 9% (高于 5% 的识别门限)，通道 B 不变；
+    # 在两个通道的外接矩形里只占约 4%，整体缩略图的平均差低于门限
+    frame = empty_frame()
+    x, y, w, h = LANE_A
+    pw, ph = int(w * patch), int(h * patch)
+    frame[y + 10:y + 10 + ph, x + 10:x + 10 + pw] = (20, 20, 140)
+
+    result = vision.detect(frame)
+    lane_a, lane_b = result["lanes"]["A"], result["lanes"]["B"]
+    checks.append(("单通道出现物体时不复用旧结果", not result["cached"]))
+    checks.append(("通道 A 识别为 red", lane_a["detected"] and lane_a["color"] == "red"))
+    checks.append(("通道 B 保持无物体", not lane_b["detected"]))
+    return checks
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉变化检测门自检")
+    parser.add_argument("--patch", type=float, default=0.3, help="色块边长占通道边长的比例")
+    args = parser.parse_args()
+
+    vision, config_dir = make_vision()
+    try:
+        checks = run_checks(vision, args.patch)
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+    print()
+    for name, ok in checks:
+        print(f"  {'✅' if ok else '❌'} {name}")
+
+    if all(ok for _, ok in checks):
+        print("\n✅ 变化检测门自检通过")
+        return
+    print("\n❌ 变化检测门自检失败")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
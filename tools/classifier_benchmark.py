@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# tools/classifier_benchmark.py
+# 颜色分类器基准：对比原始做法 (每种颜色 cv2.inRange + 腐蚀膨胀 + countNonZero)
+# 与 ColorClassifier 的 lut / inrange / percolor 三条路径及 auto 选择，在 ROI 尺寸与整帧尺寸下的单帧耗时。
+# 颜色组取 vision_config.json 中的颜色 (若有)、VisionSystem 内置默认 3 色，以及 3 色 / 4 色两组标准配置。无需摄像头。
+#
+# 用法示例:
+#   python tools/classifier_benchmark.py
+#   python tools/classifier_benchmark.py --sizes 150x200 480x640 --repeat 500
+
+import sys
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from modules.vision import VisionSystem
+from modules.color_classifier import ColorClassifier
+
+STANDARD_3 = {
+    "red": [[170, 100, 80], [10, 255, 255]],
+    "yellow": [[20, 80, 80], [35, 255, 255]],
+    "silver": [[0, 0, 120], [180, 40, 255]],
+}
+STANDARD_4 = dict(STANDARD_3, black=[[0, 0, 0], [180, 255, 46]])
+
+def make_hsv(h, w, seed=0):
+    """模糊后的随机画面，颜色分布比纯噪声更接近真实传送带"""
+    rng = np.random.default_rng(seed)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (h, w, 3), dtype=np.uint8), (7, 7), 0)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+
+def baseline(colors):
+    """原始 VisionSystem.detect 的做法：每种颜色单独 inRange + 腐蚀膨胀 + 计数"""
+    def run(hsv):
+        counts = {}
+        for name, ranges in colors.items():
+            mask = np.zeros(hsv.shape[:2], dtype="uint8")
+            for lower, upper in ranges:
+                mask += cv2.inRange(hsv, lower, upper)
+            mask = cv2.erode(mask, None, iterations=2)
+            mask = cv2.dilate(mask, None, iterations=2)
+            counts[name] = cv2.countNonZero(mask)
+        return counts
+    return run
+
+def time_ms(fn, hsv, repeat):
+    fn(hsv)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(hsv)
+        samples.append(time.perf_counter() - start)
+    return float(np.percentile(samples, 50)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="颜色分类器耗时对比")
+    parser.add_argument("--sizes", nargs="+", default=["150x200", "480x640"], help="画面尺寸 (高x宽)")
+    parser.add_argument("--repeat", type=int, default=300, help="每项重复次数")
+    args = parser.parse_args()
+
+    color_sets = [("默认 3 色", VisionSystem.DEFAULT_COLORS),
+                  ("3 色", VisionSystem.parse_colors(STANDARD_3)),
+                  ("4 色", VisionSystem.parse_colors(STANDARD_4))]
+    vision = VisionSystem()
+    if vision.colors is not VisionSystem.DEFAULT_COLORS:
+        color_sets.insert(0, ("当前配置", vision.colors))
+
+    print("\n" + "=" * 86)
+    print("📊 颜色分类器单帧耗时 (p50, ms)")
+    print("=" * 86)
+    print(f"  {'颜色组':<10} {'尺寸':<10} {'区间数':>6} {'原始 inRange':>12} {'lut':>8} {'inrange':>8} {'percolor':>9} {'auto':>8}  auto 选择")
+    for title, colors in color_sets:
+        auto = ColorClassifier(colors)
+        fixed = {m: ColorClassifier(colors, method=m) for m in ColorClassifier.METHODS if m in auto.candidates}
+        for size in args.sizes:
+            h, w = [int(v) for v in size.lower().split("x")]
+            hsv = make_hsv(h, w)
+            t_base = time_ms(baseline(colors), hsv, args.repeat)
+            t = {m: time_ms(c.classify, hsv, args.repeat) for m, c in fixed.items()}
+            t_auto = time_ms(auto.classify, hsv, args.repeat)
+            cells = " ".join(f"{t.get(m, float('nan')):>{9 if m == 'percolor' else 8}.3f}" for m in ColorClassifier.METHODS)
+            print(f"  {title:<10} {size:<10} {len(auto.ranges):>6} {t_base:>12.3f} {cells} {t_auto:>8.3f}  {auto.choices[hsv.shape[:2]]}")
+
+    print("\n说明: lut / inrange 含一次开运算与 compare + countNonZero 计数；")
+    print("      percolor 即原始做法 (每种颜色各做一次腐蚀膨胀与 countNonZero)，两者耗时应基本一致。")
+    print("      auto 在每种尺寸第一次统计时三条路径交替各跑 15 次按中位数比较，只有比原始做法快 5% 以上才换用；")
+    print("      也可在 vision_config.json 中用 \"classifier\": \"lut\" / \"inrange\" / \"percolor\" 固定。")
+
+if __name__ == "__main__":
+    main()
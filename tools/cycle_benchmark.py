@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# tools/cycle_benchmark.py
+# 搬运节拍基准 (仿真模式)：无需真机，用 SimulatedMyCobot280 按 main.py 的搬运流程
+# (pick -> place -> G5 脉冲 -> go_observe) 跑若干个循环，统计每盒节拍、分阶段耗时与每段运动的到位情况。
+# 可用于改动运动逻辑后的节拍回归检查。
+#
+# 用法示例:
+#   python tools/cycle_benchmark.py --cycles 12
+#   python tools/cycle_benchmark.py --slots 1 6 --no-fly-by
+#   python tools/cycle_benchmark.py --latency 0.02 --fail-rate 0.05      # 串口更慢、偶发丢包
+#   python tools/cycle_benchmark.py --estop-after 2.0                    # 第一个循环 2 秒后撤销 G35，检验急停
+#   python tools/cycle_benchmark.py --max-p50 7.0                        # 中位节拍超过 7 秒时返回非 0
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from config import settings
+
+def build_arm(args):
+    # 必须在创建 ArmController 之前打开仿真开关
+    settings.SIMULATION_MODE = True
+    settings.SIM_SERIAL_LATENCY = args.latency
+    settings.SIM_READ_FAIL_RATE = args.fail_rate
+    settings.SIM_INITIAL_INPUTS = {settings.GPIO_START_BTN: 1, settings.GPIO_RESET_BTN: 0}
+
+    from modules.arm_control import ArmController
+    arm = ArmController()
+    if not arm.is_connected:
+        raise RuntimeError("仿真机械臂初始化失败")
+    arm.fly_by_enabled = not args.no_fly_by
+    return arm
+
+def record_moves(arm, moves):
+    """包装 wait_for_arrival，收集每段运动的 last_move_stats"""
+    original = arm.wait_for_arrival
+
+    def wrapped(*a, **kw):
+        arrived = original(*a, **kw)
+        if arm.last_move_stats:
+            moves.append(dict(arm.last_move_stats, arrived=arrived))
+        return arrived
+
+    arm.wait_for_arrival = wrapped
+
+def run_cycle(arm, slot_id, pulse_sec):
+    """与 main.perform_pick_and_place 相同的动作顺序，返回 (耗时, 是否急停)"""
+    t0 = time.time()
+    estopped = False
+    try:
+        arm.monitor_g35_estop = True
+        arm.pick(next_slot=slot_id)
+        arm.place(slot_id)
+        arm.monitor_g35_estop = False
+        arm.pulse_plc_signal(pulse_sec)
+    except RuntimeError as e:
+        if "EMERGENCY_STOP" not in str(e):
+            raise
+        estopped = True
+    finally:
+        arm.monitor_g35_estop = False
+
+    if not estopped:
+        arm.go_observe()
+    return time.time() - t0, estopped
+
+def print_report(cycle_times, moves, arm):
+    print("\n" + "=" * 50)
+    print("📊 仿真搬运节拍基准结果")
+    print("=" * 50)
+    if cycle_times:
+        ct = np.array(cycle_times)
+        print(f"循环数:     {len(ct)}")
+        print(f"节拍 p50:   {np.percentile(ct, 50):.2f} s")
+        print(f"节拍 p95:   {np.percentile(ct, 95):.2f} s")
+        print(f"节拍 max:   {ct.max():.2f} s")
+
+    if moves:
+        reasons = {}
+        for m in moves:
+            reasons[m["reason"]] = reasons.get(m["reason"], 0) + 1
+        errors = [m["settle_time"] - m["predicted"] for m in moves if m["predicted"] is not None]
+        print(f"\n运动段数:   {len(moves)} (未到位 {sum(1 for m in moves if not m['arrived'])})")
+        print("放行原因:   " + ", ".join(f"{k}={v}" for k, v in sorted(reasons.items())))
+        if errors:
+            print(f"预测误差:   平均 {np.mean(errors) * 1000:+.0f} ms, 最大 {np.max(np.abs(errors)) * 1000:.0f} ms")
+        print(f"最大超调:   {max(m['overshoot'] for m in moves):.1f}°")
+
+    report = arm.metrics.report()
+    if report:
+        print("\n分阶段耗时 (ms):")
+        print(f"  {'槽位':<4} {'阶段':<22} {'次数':>4} {'p50':>8} {'p95':>8} {'max':>8}")
+        for slot_id, phases in report.items():
+            for phase, st in phases.items():
+                print(f"  {slot_id:<6} {phase:<24} {st['count']:>4} {st['p50_ms']:>8.0f} {st['p95_ms']:>8.0f} {st['max_ms']:>8.0f}")
+
+    stats = arm.get_serial_stats()
+    if stats:
+        print("\n串口指令统计:")
+        for name, st in sorted((k, v) for k, v in stats.items() if not k.startswith("_")):
+            print(f"  {name:<18} x{st['count']:<5} rtt {st['rtt_avg_ms']:.1f} ms, 排队 avg {st['wait_avg_ms']:.1f} / max {st['wait_max_ms']:.1f} ms")
+        print(f"  串口占用率: 最近 {stats['_utilization']:.0%}，全程 {stats['_utilization_avg']:.0%}")
+
+    inputs = arm.get_input_stats()
+    if inputs:
+        print(f"  输入快照: 实际周期 {inputs['cycle_ms']:.0f} ms (名义 {inputs['period'] * 1000:.0f} ms)，"
+              f"占用串口 {inputs['link_share']:.0%} (上限 {inputs['budget']:.0%})，让出 {inputs['deferred']} 次")
+
+def main():
+    parser = argparse.ArgumentParser(description="仿真模式搬运节拍基准")
+    parser.add_argument("--cycles", type=int, default=6, help="搬运循环次数")
+    parser.add_argument("--slots", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6], help="依次轮流放置的槽位")
+    parser.add_argument("--latency", type=float, default=getattr(settings, 'SIM_SERIAL_LATENCY', 0.008), help="模拟串口往返延迟 (秒)")
+    parser.add_argument("--fail-rate", type=float, default=getattr(settings, 'SIM_READ_FAIL_RATE', 0.0), help="模拟读取失败概率")
+    parser.add_argument("--no-fly-by", action="store_true", help="关闭飞越模式，所有点位都等待完全到位")
+    parser.add_argument("--estop-after", type=float, default=None, help="第一个循环开始后多少秒撤销 G35 (急停测试)")
+    parser.add_argument("--max-p50", type=float, default=None, help="中位节拍上限 (秒)，超过则返回非 0")
+    args = parser.parse_args()
+
+    arm = build_arm(args)
+    robot = arm.arbiter.robot
+    moves = []
+
+    print("[Bench] 复位到观测点...")
+    arm.go_observe()
+    record_moves(arm, moves)
+
+    cycle_times = []
+    pulse_sec = getattr(settings, 'G5_PULSE_SEC', 0.5)
+    for i in range(args.cycles):
+        slot_id = args.slots[i % len(args.slots)]
+        robot.set_input(settings.GPIO_START_BTN, 1)
+        if args.estop_after is not None and i == 0:
+            robot.script_input(settings.GPIO_START_BTN, [(args.estop_after, 0)])
+
+        with arm.metrics.cycle(slot_id), arm.metrics.span("cycle.total"):
+            cost, estopped = run_cycle(arm, slot_id, pulse_sec)
+        if estopped:
+            print(f"🚨 [Bench] 第 {i + 1} 个循环 (槽位 {slot_id}) 在 {cost:.2f}s 触发急停，机械臂已锁定，停止基准")
+            break
+        cycle_times.append(cost)
+        print(f"✅ [Bench] 第 {i + 1} 个循环 -> 槽位 {slot_id}: {cost:.2f} s")
+
+    print_report(cycle_times, moves, arm)
+
+    if args.max_p50 is not None and cycle_times and np.percentile(cycle_times, 50) > args.max_p50:
+        print(f"\n❌ 中位节拍超过上限 {args.max_p50:.2f} s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
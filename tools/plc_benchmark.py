@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# tools/plc_benchmark.py
+# PLC 通讯基准：测量 PLCClient.get_slots_status 的往返耗时与吞吐 (空载 / 多线程并发负载下)，
+# 以及 send_iot_start 的调用返回耗时、上升沿可见延迟与实际脉冲宽度。
+# 默认在本机启动 tools/plc_emulator.py 的仿真 PLC，无需真实 S7；指定 --ip 时直接连接真实 PLC。
+#
+# ⚠️ 连接真实 PLC 时默认不发送 IOTstart (每个脉冲都会推出一个盒子)，需要显式指定 --iot-pulses
+#
+# 用法示例:
+#   python tools/plc_benchmark.py                                   # 本机仿真 PLC
+#   python tools/plc_benchmark.py --reads 2000 --load-threads 4
+#   python tools/plc_benchmark.py --ip 192.168.0.10                 # 真实 PLC，只测读取
+#   python tools/plc_benchmark.py --max-p95-ms 5                    # 空载读取 p95 超过 5ms 时返回非 0
+
+import sys
+import os
+import time
+import argparse
+import threading
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from config import settings
+from modules.plc_comm import PLCClient
+
+def summarize(name, latencies, elapsed):
+    v = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(v, [50, 95, 99])
+    print(f"  {name:<22} {len(v):>6} {len(v) / elapsed:>10.0f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {v.max():>8.2f}")
+    return p95
+
+def bench_reads(plc, count):
+    """顺序调用 get_slots_status，返回 (每次耗时列表, 总耗时, 失败次数)"""
+    latencies = []
+    failures = 0
+    t0 = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        if plc.get_slots_status() is None:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, time.perf_counter() - t0, failures
+
+def bench_under_load(plc, count, threads):
+    """threads 个线程同时在同一个客户端上循环 read_tags (模拟轮询线程 + 控制线程争用)，测量主线程的读取耗时与总吞吐"""
+    stop = threading.Event()
+    load_reads = [0] * threads
+
+    def worker(i):
+        while not stop.is_set():
+            plc.read_tags()
+            load_reads[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for w in workers:
+        w.start()
+    try:
+        latencies, elapsed, failures = bench_reads(plc, count)
+    finally:
+        stop.set()
+        for w in workers:
+            w.join(timeout=2.0)
+    return latencies, elapsed, failures, sum(load_reads)
+
+def wait_tag(plc, name, level, timeout):
+    """轮询直到标签读到 level，返回耗时 (秒)；超时返回 None"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        tags = plc.read_tags()
+        if tags and tags.get(name) == level:
+            return time.perf_counter() - start
+    return None
+
+def bench_iot_start(plc, pulses):
+    """返回 (调用返回耗时, 上升沿可见延迟, 实际脉冲宽度) 三个列表"""
+    calls, rises, widths = [], [], []
+    for i in range(pulses):
+        start = time.perf_counter()
+        ok = plc.send_iot_start()
+        calls.append(time.perf_counter() - start)
+        if not ok:
+            print(f"⚠️ 第 {i + 1} 个脉冲发送失败")
+            continue
+        rise = wait_tag(plc, "iot_start", 1, 2.0)
+        if rise is None:
+            print(f"⚠️ 第 {i + 1} 个脉冲: 2 秒内未读到上升沿")
+            continue
+        rises.append(calls[-1] + rise)
+        fall = wait_tag(plc, "iot_start", 0, plc.iot_start_pulse + 2.0)
+        if fall is not None:
+            widths.append(rise + fall)
+        # 两个脉冲之间留出间隔，避免重新计时把两个脉冲合并
+        time.sleep(0.1)
+    return calls, rises, widths
+
+def main():
+    parser = argparse.ArgumentParser(description="PLC 通讯延迟与吞吐基准")
+    parser.add_argument("--ip", default=None, help="真实 PLC 地址；不指定则在本机启动仿真 PLC")
+    parser.add_argument("--port", type=int, default=None, help="S7 端口 (仿真默认 1102，真实 PLC 默认 102)")
+    parser.add_argument("--reads", type=int, default=1000, help="每一轮 get_slots_status 的调用次数")
+    parser.add_argument("--load-threads", type=int, nargs="+", default=[1, 4], help="并发负载线程数 (可给多个，逐一测量)")
+    parser.add_argument("--iot-pulses", type=int, default=None, help="send_iot_start 次数 (仿真默认 10，真实 PLC 默认 0)")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="空载读取 p95 上限 (毫秒)，超过则返回非 0")
+    args = parser.parse_args()
+
+    emulator = None
+    tags = getattr(settings, 'PLC_TAGS', None)
+    if args.ip is None:
+        from plc_emulator import PLCEmulator
+        port = args.port or 1102
+        emulator = PLCEmulator(port=port, tags=tags).start()
+        ip = "127.0.0.1"
+        pulses = 10 if args.iot_pulses is None else args.iot_pulses
+    else:
+        port = args.port or getattr(settings, 'PLC_TCP_PORT', 102)
+        ip = args.ip
+        pulses = args.iot_pulses or 0
+
+    plc = PLCClient(ip=ip, tcp_port=port, tags=tags,
+                    iot_start_pulse=getattr(settings, 'PLC_IOT_START_PULSE_SEC', 0.5))
+    if not plc.connected:
+        print(f"❌ 无法连接 PLC {ip}:{port}")
+        if emulator:
+            emulator.stop()
+        sys.exit(1)
+
+    failed = False
+    try:
+        # 预热：建立连接后的第一次读取通常偏慢
+        bench_reads(plc, 20)
+
+        print("\n" + "=" * 78)
+        print(f"📊 PLC 通讯基准 ({'本机仿真' if emulator else '真实 PLC'} {ip}:{port}，每次读取 {plc._tag_size} 字节)")
+        print("=" * 78)
+        print(f"  {'测试项':<18} {'次数':>6} {'次/秒':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+        latencies, elapsed, failures = bench_reads(plc, args.reads)
+        idle_p95 = summarize("get_slots_status", latencies, elapsed)
+        if failures:
+            print(f"  ⚠️ 失败 {failures} 次")
+
+        for threads in args.load_threads:
+            latencies, elapsed, failures, load_reads = bench_under_load(plc, args.reads, threads)
+            summarize(f"+ {threads} 线程负载", latencies, elapsed)
+            print(f"  {'':<22} 负载线程共读取 {load_reads} 次，总吞吐 {(len(latencies) + load_reads) / elapsed:.0f} 次/秒"
+                  + (f"，失败 {failures} 次" if failures else ""))
+
+        if pulses:
+            calls, rises, widths = bench_iot_start(plc, pulses)
+            print(f"\n  send_iot_start x{pulses} (配置脉宽 {plc.iot_start_pulse * 1000:.0f} ms):")
+            print(f"    调用返回:   p50 {np.percentile(calls, 50) * 1000:.2f} ms, max {max(calls) * 1000:.2f} ms")
+            if rises:
+                print(f"    上升沿可见: p50 {np.percentile(rises, 50) * 1000:.2f} ms, max {max(rises) * 1000:.2f} ms")
+            if widths:
+                print(f"    实测脉宽:   p50 {np.percentile(widths, 50) * 1000:.0f} ms, "
+                      f"min {min(widths) * 1000:.0f} ms, max {max(widths) * 1000:.0f} ms")
+            if emulator:
+                seen = emulator.pulse_stats()
+                print(f"    仿真 PLC 侧共看到 {seen['count']} 个脉冲")
+
+        stats = plc.get_stats()
+        print("\n  客户端统计:")
+        for name in ("connect", "read", "write"):
+            if name in stats:
+                st = stats[name]
+                print(f"    {name:<8} x{st['count']:<7} 失败 {st['errors']:<4} avg {st['avg_ms']:.2f} ms, max {st['max_ms']:.2f} ms")
+        print(f"    合并写入 {stats['_coalesced_writes']} 次，丢弃写入 {stats['_dropped_writes']} 次")
+
+        if args.max_p95_ms is not None and idle_p95 > args.max_p95_ms:
+            print(f"\n❌ 空载读取 p95 {idle_p95:.2f} ms 超过上限 {args.max_p95_ms:.2f} ms")
+            failed = True
+    except KeyboardInterrupt:
+        print("\n⏹️ 基准已终止。")
+    finally:
+        plc.close()
+        if emulator:
+            emulator.stop()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
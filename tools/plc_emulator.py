@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# tools/plc_emulator.py
+# 本地仿真 PLC：基于 snap7.server 在本机开一个 S7 服务端，暴露 DB1，位地址与 settings.PLC_TAGS 一致。
+# 无需真实 S7 即可在离线 Linux 上调试 PLCClient / PLCPoller / main.py 的 PLC 部分。
+#
+# 可脚本化的行为:
+#   - 槽位初始占用 (--slots)，以及按时间改变任意标签 (--script 秒:标签=值)
+#   - 监视 IoT 写入的 iot_start 脉冲，统计次数与脉冲宽度；
+#     --fill-delay 秒后把第一个空槽位置满 (模拟推出的盒子被放进仓库)
+#   - --drain-every 秒随机清空一个满槽位 (模拟人工取货)
+#   - --permit-period / --permit-width 周期性拉高 start_permit (模拟 PLC 的启动许可脉冲)
+#
+# 用法示例:
+#   python tools/plc_emulator.py                                          # 监听 1102 端口，6 个槽位全空
+#   python tools/plc_emulator.py --slots 1 1 0 0 0 0 --fill-delay 2.0
+#   python tools/plc_emulator.py --script 5:slot1=0 8:reset_request=1 9:reset_request=0
+#   python tools/plc_emulator.py --permit-period 8 --permit-width 1.0
+# 然后在 config/settings.py 中设置 PLC_IP = "127.0.0.1"、PLC_TCP_PORT = 1102 再运行 main.py
+
+import sys
+import os
+import time
+import ctypes
+import random
+import argparse
+import threading
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+import snap7
+from snap7.type import SrvArea
+
+from config import settings
+from modules.plc_comm import DEFAULT_TAGS
+
+class PLCEmulator:
+    """
+    snap7.server 仿真 PLC
+
+    DB 内存直接交给服务端，客户端的读写与本类的 get / set 操作同一块内存；
+    后台线程按 1ms 周期执行时间脚本，并监视 iot_start 的上升 / 下降沿。
+    """
+
+    def __init__(self, port=1102, db_number=1, db_size=16, tags=None, fill_delay=None,
+                 drain_every=None, permit_period=None, permit_width=1.0, seed=None):
+        self.port = port
+        self.db_number = db_number
+        self.tags = dict(DEFAULT_TAGS, **(tags or {}))
+        self.fill_delay = fill_delay
+        self.drain_every = drain_every
+        self.permit_period = permit_period
+        self.permit_width = permit_width
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._script = []           # [(生效时间戳, 标签, 值)]，按时间排序
+        self._rising_callbacks = {} # {标签: [callback(时间戳)]}
+
+        self.pulses = []            # [(标签, 上升沿时间戳, 宽度秒)]
+        self._high_since = {}       # {标签: 上升沿时间戳}
+
+        self.server = snap7.server.Server()
+        self.db = self._register(db_size)
+
+        self.running = False
+        self._thread = None
+
+    def _register(self, size):
+        # python-snap7 3.x 直接共享 bytearray；1.x / 2.x 基于 C 库，需要 ctypes 数组
+        try:
+            db = bytearray(size)
+            self.server.register_area(SrvArea.DB, self.db_number, db)
+        except Exception:
+            db = (ctypes.c_uint8 * size)()
+            self.server.register_area(SrvArea.DB, self.db_number, db)
+        return db
+
+    # ---------- 标签读写 ----------
+    def get(self, name):
+        byte, bit = self.tags[name]
+        return (self.db[byte] >> bit) & 1
+
+    def set(self, name, value):
+        byte, bit = self.tags[name]
+        with self._lock:
+            if value:
+                self.db[byte] |= (1 << bit)
+            else:
+                self.db[byte] &= ~(1 << bit) & 0xFF
+
+    def set_slots(self, values):
+        for i, v in enumerate(values, start=1):
+            self.set(f"slot{i}", v)
+
+    def slots(self):
+        return {i: self.get(f"slot{i}") for i in range(1, 7) if f"slot{i}" in self.tags}
+
+    def script(self, steps):
+        """按时间改变标签，steps: [(相对现在的秒数, 标签, 值), ...]"""
+        now = time.time()
+        with self._lock:
+            self._script.extend((now + dt, name, value) for dt, name, value in steps)
+            self._script.sort(key=lambda s: s[0])
+
+    def on_rising(self, name, callback):
+        self._rising_callbacks.setdefault(name, []).append(callback)
+
+    # ---------- 运行 ----------
+    def start(self):
+        self.server.start(tcp_port=self.port)
+        self.running = True
+        if self.fill_delay is not None:
+            self.on_rising("iot_start", self._schedule_fill)
+        if self.drain_every:
+            self.script([(self.drain_every, "_drain", 1)])
+        if self.permit_period and "start_permit" in self.tags:
+            self.script([(self.permit_period, "_permit", 1)])
+        self._thread = threading.Thread(target=self._run, name="PLCEmulator", daemon=True)
+        self._thread.start()
+        print(f"✅ [PLC-Sim] 仿真 PLC 已启动: 0.0.0.0:{self.port} DB{self.db_number} ({len(self.db)} 字节)")
+        return self
+
+    def _run(self):
+        watched = [name for name in ("iot_start",) if name in self.tags]
+        while self.running:
+            now = time.time()
+            self._apply_script(now)
+            for name in watched:
+                self._watch_edge(name, now)
+            time.sleep(0.001)
+
+    def _apply_script(self, now):
+        due = []
+        with self._lock:
+            while self._script and self._script[0][0] <= now:
+                due.append(self._script.pop(0))
+        for _, name, value in due:
+            # 以下划线开头的是内部动作，其余为普通标签
+            if name == "_fill":
+                self._fill_one()
+            elif name == "_drain":
+                self._drain_one()
+                self.script([(self.drain_every, "_drain", 1)])
+            elif name == "_permit":
+                self.set("start_permit", 1)
+                self.script([(self.permit_width, "start_permit", 0), (self.permit_period, "_permit", 1)])
+            else:
+                self.set(name, value)
+
+    def _watch_edge(self, name, now):
+        level = self.get(name)
+        since = self._high_since.get(name)
+        if level and since is None:
+            self._high_since[name] = now
+            for callback in self._rising_callbacks.get(name, []):
+                callback(now)
+        elif not level and since is not None:
+            width = now - self._high_since.pop(name)
+            self.pulses.append((name, since, width))
+            print(f"[PLC-Sim] {name} 脉冲 #{sum(1 for p in self.pulses if p[0] == name)}: 宽度 {width * 1000:.0f} ms")
+
+    def _schedule_fill(self, ts):
+        self.script([(self.fill_delay, "_fill", 1)])
+
+    def _fill_one(self):
+        for slot_id, v in self.slots().items():
+            if v == 0:
+                self.set(f"slot{slot_id}", 1)
+                print(f"[PLC-Sim] 槽位 {slot_id} -> 满")
+                return
+
+    def _drain_one(self):
+        full = [slot_id for slot_id, v in self.slots().items() if v]
+        if full:
+            slot_id = self._rng.choice(full)
+            self.set(f"slot{slot_id}", 0)
+            print(f"[PLC-Sim] 槽位 {slot_id} -> 空 (模拟取货)")
+
+    def pulse_stats(self, name="iot_start"):
+        widths = [w for n, _, w in self.pulses if n == name]
+        return {"count": len(widths), "widths": widths}
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.server.stop()
+        self.server.destroy()
+
+def parse_script(items):
+    """'5:slot1=0' -> (5.0, 'slot1', 0)"""
+    steps = []
+    for item in items:
+        when, assign = item.split(":", 1)
+        name, value = assign.split("=", 1)
+        steps.append((float(when), name.strip(), int(value)))
+    return steps
+
+def main():
+    parser = argparse.ArgumentParser(description="本地仿真 PLC (snap7.server)")
+    parser.add_argument("--port", type=int, default=1102, help="监听端口 (102 需要 root 权限)")
+    parser.add_argument("--slots", type=int, nargs=6, default=[0] * 6, help="6 个槽位的初始占用 (1=满)")
+    parser.add_argument("--script", nargs="+", default=[], help="时间脚本，格式 秒:标签=值，如 5:slot1=0")
+    parser.add_argument("--fill-delay", type=float, default=None, help="收到 iot_start 脉冲多少秒后把第一个空槽位置满")
+    parser.add_argument("--drain-every", type=float, default=None, help="每隔多少秒随机清空一个满槽位")
+    parser.add_argument("--permit-period", type=float, default=None, help="每隔多少秒拉高一次 start_permit")
+    parser.add_argument("--permit-width", type=float, default=1.0, help="start_permit 高电平持续时间 (秒)")
+    args = parser.parse_args()
+
+    emu = PLCEmulator(port=args.port, tags=getattr(settings, 'PLC_TAGS', None), fill_delay=args.fill_delay,
+                      drain_every=args.drain_every, permit_period=args.permit_period, permit_width=args.permit_width)
+    emu.set_slots(args.slots)
+    emu.script(parse_script(args.script))
+    emu.start()
+
+    print(f"👉 在 config/settings.py 中设置 PLC_IP = \"127.0.0.1\"、PLC_TCP_PORT = {args.port} 即可连接。按 Ctrl+C 退出。")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stats = emu.pulse_stats()
+        emu.stop()
+        print(f"\n⏹️ 仿真 PLC 已停止。共收到 iot_start 脉冲 {stats['count']} 次，最终槽位: {emu.slots()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# tools/record_frames.py
+# 录制摄像头画面到 .cfr 文件，供 tools/vision_benchmark.py 离线回放
+#
+# 用法示例:
+#   python tools/record_frames.py --out logs/red.cfr --label red --count 300
+#   python tools/record_frames.py --out logs/empty.cfr --label none --full
+
+import sys
+import os
+import time
+import argparse
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from modules.camera import CameraCapture
+from modules.vision import VisionSystem
+from modules.frame_recorder import FrameRecorder
+from config import settings
+
+def main():
+    parser = argparse.ArgumentParser(description="录制视觉数据集 (.cfr)")
+    parser.add_argument("--out", required=True, help="输出文件路径")
+    parser.add_argument("--label", default=None, help="本段录像的标签，例如 red / yellow / silver / none")
+    parser.add_argument("--count", type=int, default=300, help="录制帧数")
+    parser.add_argument("--full", action="store_true", help="录制整帧 (默认只录 ROI 裁切图)")
+    parser.add_argument("--interval", type=float, default=0.0, help="两帧之间的最小间隔 (秒)")
+    args = parser.parse_args()
+
+    roi = None
+    if not args.full:
+        roi = VisionSystem().roi
+        if not roi:
+            print("❌ 未配置 ROI，请先运行 tools/calibrate_vision.py，或使用 --full 录制整帧")
+            return
+
+    camera = CameraCapture(
+        index=getattr(settings, 'CAMERA_INDEX', 0),
+        width=getattr(settings, 'CAMERA_WIDTH', 640),
+        height=getattr(settings, 'CAMERA_HEIGHT', 480)
+    ).start()
+
+    print(f"🎥 开始录制 {args.count} 帧 -> {args.out} (标签: {args.label}, {'整帧' if args.full else 'ROI 裁切'})")
+    last_seq = 0
+    try:
+        with FrameRecorder(args.out, roi_crop=not args.full) as recorder:
+            while recorder.frame_count < args.count:
+                last_seq, ts, frame = camera.wait_next(last_seq, timeout=2.0)
+                if frame is None:
+                    print("⚠️ 等待摄像头画面超时")
+                    continue
+
+                if roi:
+                    x, y, w, h = roi
+                    frame = frame[y:y+h, x:x+w]
+                recorder.write(frame, timestamp=ts, label=args.label)
+
+                sys.stdout.write(f"\r已录制 {recorder.frame_count}/{args.count}")
+                sys.stdout.flush()
+                if args.interval > 0:
+                    time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n⏹️ 录制被中断，已保存现有画面。")
+    finally:
+        camera.release()
+
+    print(f"\n💾 录制完成: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# tools/tune_motion.py
+# 运动参数自动整定：按真实的抓放流程 (pick -> place -> go_observe) 反复运行，
+# 对每个点位依次尝试一组候选速度，记录每段运动的到位结果、耗时与放行瞬间的残余误差，
+# 为每个点位挑出 "全部按公差到位" 前提下最快的速度，并按实测最大耗时给出超时
+# (超时只会放宽、不会低于当前配置：飞越点位的实测耗时是提前放行的耗时，
+# 而 pick/place 不检查到位结果，超时返回后气爪照样动作)，
+# 最后打印可直接粘贴进 config/settings.py 的 MOTION_PROFILES。
+#
+# ⚠️ 真机运行前请确认抓取区与各槽位无遮挡！整定过程中 G35 急停监控保持关闭。
+#
+# 用法示例:
+#   python tools/tune_motion.py --slots 1 3 6                 # 真机整定 1/3/6 号槽位相关点位
+#   python tools/tune_motion.py --sim --reps 5                # 在仿真机械臂上演练
+#   python tools/tune_motion.py --fly-speeds 70 80 90 100 --precise-speeds 40 50 60
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from config import settings
+
+class MoveRecorder:
+    """包装 move_to_angles_smart，记录每段运动 (按点位名) 的到位情况、耗时与放行瞬间的残余误差"""
+
+    def __init__(self, arm):
+        self.arm = arm
+        self.records = {}   # {label: [(arrived, 耗时, 残余误差, 是否精准点位), ...]}
+        self._release_error = None
+        self._original = arm.move_to_angles_smart
+        self._original_wait = arm.wait_for_arrival
+        arm.move_to_angles_smart = self._wrapped
+        arm.wait_for_arrival = self._wait_wrapped
+
+    def _wait_wrapped(self, target_angles, *args, **kwargs):
+        arrived = self._original_wait(target_angles, *args, **kwargs)
+        self._release_error = None
+        if kwargs.get("precise"):
+            # 精准点位：wait_for_arrival 一返回气爪就会动作，误差必须在放行这一刻测，不能等停稳后再测
+            current = self.arm.mc.get_angles()
+            if isinstance(current, list) and len(current) == 6:
+                self._release_error = max(abs(c - t) for c, t in zip(current, target_angles))
+        return arrived
+
+    def _wrapped(self, angles, speed=None, timeout=None, fly_by=False, label=None, precise=None):
+        self._release_error = None
+        t0 = time.time()
+        arrived = self._original(angles, speed, timeout, fly_by=fly_by, label=label, precise=precise)
+        cost = time.time() - t0
+
+        if label:
+            self.records.setdefault(label, []).append((bool(arrived), cost, self._release_error, bool(precise)))
+        return arrived
+
+    def clear(self):
+        self.records = {}
+
+def run_sequence(arm, slots, reps):
+    for _ in range(reps):
+        for slot_id in slots:
+            arm.pick(next_slot=slot_id)
+            arm.place(slot_id)
+            arm.go_observe()
+
+def evaluate(arm, samples, label):
+    """该点位在当前候选速度下是否全部合格，返回 (合格, 平均耗时, 最大耗时)"""
+    tolerance = arm.get_profile(label, samples[0][3])["tolerance"]
+    # 超时 (arrived=False) 一律不合格；精准点位还要求放行瞬间的误差在公差以内
+    ok = all(arrived for arrived, _, _, _ in samples)
+    ok = ok and all(err is None or err <= tolerance for _, _, err, _ in samples)
+    costs = [c for _, c, _, _ in samples]
+    return ok, float(np.mean(costs)), float(np.max(costs))
+
+def is_precise_label(label):
+    """grab 与各槽位 low 为精准点位，其余都是空中途经点"""
+    return label == "grab" or label.endswith("_low")
+
+def tune_class(arm, recorder, slots, reps, speeds, precise):
+    """对一类点位 (飞越 / 精准) 逐个候选速度跑完整流程，返回 {label: {speed: (合格, 平均, 最大)}}"""
+    results = {}
+    cls = "precise" if precise else "fly"
+    saved = {k: dict(v) for k, v in arm.motion_profiles.items()}
+
+    try:
+        for speed in speeds:
+            # 该类所有点位统一用候选速度 (去掉点位级覆盖)，另一类保持当前配置
+            profiles = {k: dict(v) for k, v in saved.items()}
+            profiles[cls]["speed"] = speed
+            for name, profile in profiles.items():
+                if name not in ("fly", "precise") and is_precise_label(name) == precise:
+                    profile.pop("speed", None)
+            arm.motion_profiles = profiles
+            print(f"\n▶️ [{cls}] 候选速度 {speed}，运行 {reps} 轮...")
+
+            recorder.clear()
+            run_sequence(arm, slots, reps)
+
+            for label, samples in sorted(recorder.records.items()):
+                if is_precise_label(label) != precise:
+                    continue
+                ok, mean_cost, max_cost = evaluate(arm, samples, label)
+                results.setdefault(label, {})[speed] = (ok, mean_cost, max_cost)
+                print(f"   {label:<12} {'✅' if ok else '❌'} 平均 {mean_cost:.2f}s  最大 {max_cost:.2f}s")
+    finally:
+        arm.motion_profiles = saved
+    return results
+
+def choose(results, arm, precise):
+    """
+    每个点位选合格且平均耗时最短的速度，超时 = 最大耗时 x 1.5 + 0.5 秒 (取 0.5 的整数倍)
+    超时一律不低于当前配置：飞越点位实测的是提前放行 (进入公差即返回) 的耗时，不代表完整到位所需时间；
+    几轮样本的最大耗时也不代表最坏情况，而 pick/place 不检查返回值，超时返回后气爪照样动作
+    """
+    chosen = {}
+    for label, by_speed in sorted(results.items()):
+        passed = [(mean, speed, worst) for speed, (ok, mean, worst) in by_speed.items() if ok]
+        if not passed:
+            print(f"⚠️ {label}: 所有候选速度都未能稳定到位，保留当前配置")
+            continue
+        _, speed, worst = min(passed)
+        profile = arm.get_profile(label, precise)
+        timeout = max(1.0, np.ceil((worst * 1.5 + 0.5) * 2) / 2, profile["timeout"])
+        chosen[label] = {"speed": int(speed), "tolerance": profile["tolerance"], "timeout": float(timeout)}
+    return chosen
+
+def main():
+    parser = argparse.ArgumentParser(description="运动参数自动整定")
+    parser.add_argument("--slots", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6], help="参与整定的槽位")
+    parser.add_argument("--reps", type=int, default=3, help="每个候选速度重复的完整流程轮数")
+    parser.add_argument("--fly-speeds", type=int, nargs="+", default=[60, 70, 80, 90, 100], help="飞越点位候选速度")
+    parser.add_argument("--precise-speeds", type=int, nargs="+", default=[30, 40, 50, 60, 70], help="精准点位候选速度")
+    parser.add_argument("--sim", action="store_true", help="使用仿真机械臂 (SIMULATION_MODE)")
+    args = parser.parse_args()
+
+    if args.sim:
+        settings.SIMULATION_MODE = True
+
+    from modules.arm_control import ArmController
+    arm = ArmController()
+    if not arm.is_connected:
+        print("❌ 机械臂连接失败，请检查连线或端口配置！")
+        return
+
+    arm.monitor_g35_estop = False
+    recorder = MoveRecorder(arm)
+
+    try:
+        print("[Tune] 复位到观测点...")
+        arm.go_observe()
+
+        fly_results = tune_class(arm, recorder, args.slots, args.reps, args.fly_speeds, precise=False)
+        precise_results = tune_class(arm, recorder, args.slots, args.reps, args.precise_speeds, precise=True)
+    except KeyboardInterrupt:
+        print("\n⏹️ 整定被中断，机械臂急停")
+        arm.emergency_stop()
+        return
+
+    chosen = choose(fly_results, arm, False)
+    chosen.update(choose(precise_results, arm, True))
+
+    print("\n\n" + "=" * 60)
+    print("✨ 请直接将以下代码复制并替换 config/settings.py 中的 MOTION_PROFILES ✨")
+    print("=" * 60 + "\n")
+    print("MOTION_PROFILES = {")
+    for cls in ("fly", "precise"):
+        p = arm.motion_profiles[cls]
+        print(f'    "{cls}": {{"speed": {p["speed"]}, "tolerance": {p["tolerance"]}, "timeout": {p["timeout"]}}},')
+    for label, p in chosen.items():
+        print(f'    "{label}": {{"speed": {p["speed"]}, "tolerance": {p["tolerance"]}, "timeout": {p["timeout"]}}},')
+    print("}")
+    print("\n" + "=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# tools/vision_benchmark.py
+# 离线视觉回放基准：用固定数据集驱动 VisionSystem 的检测流程，
+# 统计吞吐 (帧/秒)、单帧延迟 p50/p99 以及按颜色的混淆矩阵。无需摄像头。
+#
+# 用法示例:
+#   python tools/vision_benchmark.py logs/red.cfr logs/yellow.cfr logs/empty.cfr
+#   python tools/vision_benchmark.py logs/*.cfr --repeat 5
+#   python tools/vision_benchmark.py logs/red.cfr --overlay   # 同时计入画面标注耗时 (process_frame)
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# 将项目根目录加入环境变量
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from modules.vision import VisionSystem
+from modules.frame_recorder import FrameReader
+
+NO_ITEM = "none"
+
+def run_benchmark(paths, repeat=1, warmup=10, overlay=False, gate=True):
+    vision = VisionSystem()
+    vision.change_gate["enabled"] = gate
+    latencies = []
+    confusion = {}  # {真实标签: {预测结果: 次数}}
+
+    for path in paths:
+        reader = FrameReader(path)
+        print(f"📂 {path}: {len(reader)} 帧, 尺寸 {reader.shape}, {'ROI 裁切' if reader.roi_crop else '整帧'}")
+
+        # ROI 裁切录像：把整张图当作检测区
+        if reader.roi_crop:
+            h, w, _ = reader.shape
+            vision.roi = [0, 0, w, h]
+
+        for i, (_, label, frame) in enumerate(reader):
+            if i >= warmup:
+                break
+            vision.detect(frame)
+
+        for _ in range(repeat):
+            for _, label, frame in reader:
+                if overlay:
+                    # memmap 只读，process_frame 会在画面上绘图，所以先复制 (复制耗时不计入)
+                    work = np.array(frame)
+                    t0 = time.perf_counter()
+                    _, result = vision.process_frame(work)
+                else:
+                    # detect 只读画面，可以直接在 memmap 视图上运行
+                    t0 = time.perf_counter()
+                    result = vision.detect(frame)
+                latencies.append(time.perf_counter() - t0)
+
+                if label is not None:
+                    predicted = result["color"] if result["detected"] else NO_ITEM
+                    row = confusion.setdefault(label, {})
+                    row[predicted] = row.get(predicted, 0) + 1
+
+    stats = vision.gate_stats
+    print(f"🚦 变化检测门: 完整识别 {stats['full']} 次, 复用结果 {stats['reused']} 次")
+    return np.array(latencies), confusion
+
+def print_report(latencies, confusion):
+    if len(latencies) == 0:
+        print("⚠️ 数据集为空")
+        return
+
+    total = latencies.sum()
+    print("\n" + "=" * 50)
+    print("📊 视觉回放基准结果")
+    print("=" * 50)
+    print(f"帧数:      {len(latencies)}")
+    print(f"吞吐:      {len(latencies) / total:.1f} 帧/秒")
+    print(f"延迟 p50:  {np.percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"延迟 p99:  {np.percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"延迟 max:  {latencies.max() * 1000:.2f} ms")
+
+    if not confusion:
+        print("\n(数据集没有标签，跳过混淆矩阵)")
+        return
+
+    predicted_names = sorted({p for row in confusion.values() for p in row})
+    col_w = max(8, max(len(n) for n in predicted_names) + 2)
+    print("\n混淆矩阵 (行=真实标签, 列=识别结果):")
+    print("".ljust(col_w) + "".join(n.rjust(col_w) for n in predicted_names) + "准确率".rjust(col_w))
+
+    correct_all = 0
+    count_all = 0
+    for label in sorted(confusion):
+        row = confusion[label]
+        n = sum(row.values())
+        correct = row.get(label, 0)
+        correct_all += correct
+        count_all += n
+        cells = "".join(str(row.get(p, 0)).rjust(col_w) for p in predicted_names)
+        print(label.ljust(col_w) + cells + f"{correct / n * 100:.1f}%".rjust(col_w))
+
+    print(f"\n总体准确率: {correct_all / count_all * 100:.1f}% ({correct_all}/{count_all})")
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉离线回放基准")
+    parser.add_argument("paths", nargs="+", help=".cfr 录像文件 (tools/record_frames.py 生成)")
+    parser.add_argument("--repeat", type=int, default=1, help="数据集重复回放次数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个文件的预热帧数 (不计时)")
+    parser.add_argument("--overlay", action="store_true", help="使用 process_frame (检测 + 画面标注) 计时")
+    parser.add_argument("--no-gate", action="store_true", help="关闭变化检测门，每帧都做完整识别")
+    args = parser.parse_args()
+
+    latencies, confusion = run_benchmark(args.paths, repeat=args.repeat, warmup=args.warmup,
+                                         overlay=args.overlay, gate=not args.no_gate)
+    print_report(latencies, confusion)
+
+if __name__ == "__main__":
+    main()